@@ -0,0 +1,10 @@
+// Hand-written equivalent of examples/basic.wl.
+long compute()
+{
+  return (1 + (3 * 6 / 9 + 11 - 5) / 2 + 4) * 9;
+}
+
+int main()
+{
+  return (int)compute();
+}
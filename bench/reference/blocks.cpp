@@ -0,0 +1,5 @@
+// Hand-written equivalent of examples/blocks.wl.
+int main()
+{
+  return 7;
+}
@@ -0,0 +1,15 @@
+// Hand-written equivalent of examples/vardecl.wl.
+long compute()
+{
+  long a = 6;
+  long b = 3;
+  long c = b;
+  b = c + 2;
+  const long internal = b + 36;
+  return a + internal - b;
+}
+
+int main()
+{
+  return (int)compute();
+}
@@ -0,0 +1,210 @@
+"""
+Runtime benchmark of compiled Waterlang programs.
+
+Compiles examples/*.wl and a set of generated programs, runs every binary repeatedly after a warmup
+and records the median and 95th percentile of the run time, the binary size and the compile time.
+Programs with a hand-written C++ equivalent in bench/reference are compared against it,
+and the whole run can be compared against an earlier one saved as JSON.
+
+Waterlang programs take no input, so the optimizer folds every generated program to a single return.
+The generated programs are therefore always built without optimization passes, so that there is
+still a run time to measure. Modules without main are skipped.
+"""
+import glob
+import json
+import os
+import random
+import statistics
+import subprocess as sp
+import sys
+import tempfile
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from waterlang.api import CompileOptions, compile_source
+
+REFERENCE_DIR = os.path.join(ROOT_DIR, "bench", "reference")
+
+def usage(program_name) -> None:
+    print(f"""
+{program_name} [PARAMS...]
+Parameters:
+--runs=N        timed runs of every binary, defaults to 50
+--warmup=N      untimed runs before the timed ones, defaults to 5
+--generated=N   number of generated programs, defaults to 5
+--out=FILE      save the results as JSON
+--baseline=FILE compare the results with an earlier run
+--no-opt        don't run the optimization passes. generated programs are never optimized,
+                as the optimizer folds them to a single return
+          """)
+
+def generate(seed: int, length: int) -> str:
+    """
+    Generates a program that declares and reassigns a lot of variables.
+    Values are kept small enough that the program never overflows or divides by zero.
+    """
+    rng = random.Random(seed)
+    lines = ["func main() -> int is", "begin"]
+    values: dict[str, int] = {}
+    for i in range(length):
+        expr, value = generate_expr(rng, values)
+        if values and rng.random() < 0.3:
+            target = rng.choice(list(values))
+            lines.append(f"    {target} = {expr};")
+        else:
+            target = f"v{i}"
+            lines.append(f"    var {target}: int = {expr};")
+        values[target] = value
+    expr, _ = generate_expr(rng, values)
+    lines.append(f"    return {expr};")
+    lines.append("end func")
+    return "\n".join(lines) + "\n"
+
+def generate_expr(rng: random.Random, values: dict[str, int]) -> tuple[str, int]:
+    def operand() -> tuple[str, int]:
+        if values and rng.random() < 0.7:
+            name = rng.choice(list(values))
+            return name, values[name]
+        n = rng.randint(1, 100)
+        return str(n), n
+
+    expr, value = operand()
+    for _ in range(rng.randint(0, 3)):
+        op = rng.choice("+-*/")
+        if op in "*/":
+            rhs_value = rng.randint(1, 100)
+            rhs = str(rhs_value)
+        else:
+            rhs, rhs_value = operand()
+        expr = f"({expr} {op} {rhs})"
+        match op:
+            case "+":
+                value += rhs_value
+            case "-":
+                value -= rhs_value
+            case "*":
+                value *= rhs_value
+            case "/":
+                value = abs(value) // rhs_value * (1 if value >= 0 else -1)
+    if abs(value) > 10**12:
+        expr = f"({expr} / 1000000)"
+        value = abs(value) // 1000000 * (1 if value >= 0 else -1)
+    return expr, value
+
+def corpus(generated: int, optimize: bool) -> list[tuple[str, str, bool]]:
+    """
+    Returns the name and source of every program and whether it is built with optimization passes.
+    """
+    programs = []
+    for path in sorted(glob.glob(os.path.join(ROOT_DIR, "examples", "*.wl"))):
+        with open(path, "r") as in_file:
+            programs.append((os.path.splitext(os.path.basename(path))[0], in_file.read(), optimize))
+    for seed in range(generated):
+        programs.append((f"generated_{seed}", generate(seed, 200), False))
+    return programs
+
+def measure(binary: str, runs: int, warmup: int) -> dict:
+    for _ in range(warmup):
+        sp.run([binary], stdout=sp.DEVNULL)
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        sp.run([binary], stdout=sp.DEVNULL)
+        samples.append(time.perf_counter() - start)
+    return {
+        "median": statistics.median(samples),
+        "p95": statistics.quantiles(samples, n=20)[18] if len(samples) > 1 else samples[0],
+        "size": os.path.getsize(binary),
+    }
+
+def bench_program(name: str, source: str, out_dir: str, optimize: bool, runs: int, warmup: int) -> dict | None:
+    binary = os.path.join(out_dir, name)
+    parsed = compile_source(source, CompileOptions(file_name=name + ".wl", has_main=False, check_only=True))
+    if parsed.success and all(decl.func_name != "main" for decl in parsed.ast):
+        print(f"{name}: skipped, no main function")
+        return None
+    start = time.perf_counter()
+    result = compile_source(source, CompileOptions(file_name=name + ".wl", optimize=optimize, output=binary))
+    compile_seconds = time.perf_counter() - start
+    if not result.success:
+        print(f"{name}: skipped, does not compile")
+        return None
+    stats = measure(binary, runs, warmup)
+    stats["compile"] = compile_seconds
+    reference = os.path.join(REFERENCE_DIR, name + ".cpp")
+    if os.path.exists(reference):
+        ref_binary = binary + "_reference"
+        start = time.perf_counter()
+        gpp_result = sp.run(["g++", reference, "-o", ref_binary, "-g"], capture_output=True)
+        ref_compile_seconds = time.perf_counter() - start
+        if gpp_result.returncode != 0:
+            print(f"{name}: skipped hand-written C++, does not compile:\n{gpp_result.stderr.decode("utf8")}")
+            return stats
+        stats["reference"] = measure(ref_binary, runs, warmup)
+        stats["reference"]["compile"] = ref_compile_seconds
+    return stats
+
+def fmt(stats: dict) -> str:
+    return (f"median {stats["median"] * 1000:.3f} ms, p95 {stats["p95"] * 1000:.3f} ms, "
+            f"{stats["size"]} bytes, compiled in {stats["compile"] * 1000:.1f} ms")
+
+def compare(results: dict, baseline: dict) -> None:
+    for name, stats in results.items():
+        if name not in baseline:
+            continue
+        old = baseline[name]
+        change = (stats["median"] - old["median"]) / old["median"] * 100
+        print(f"{name}: median {change:+.1f}%, size {stats["size"] - old["size"]:+d} bytes against baseline")
+
+def main() -> int:
+    args = sys.argv
+    runs = 50
+    warmup = 5
+    generated = 5
+    out_file_name = None
+    baseline_file_name = None
+    optimize = True
+    for param in args[1:]:
+        match param.split("=", 1):
+            case ["--runs", n]:
+                runs = int(n)
+            case ["--warmup", n]:
+                warmup = int(n)
+            case ["--generated", n]:
+                generated = int(n)
+            case ["--out", name]:
+                out_file_name = name
+            case ["--baseline", name]:
+                baseline_file_name = name
+            case ["--no-opt"]:
+                optimize = False
+            case ["--help"]:
+                usage(args[0])
+                return 0
+            case _:
+                usage(args[0])
+                print(f"ERROR: unknown parameter {param}")
+                return 2
+    results = {}
+    with tempfile.TemporaryDirectory() as out_dir:
+        for name, source, program_optimize in corpus(generated, optimize):
+            stats = bench_program(name, source, out_dir, program_optimize, runs, warmup)
+            if stats is None:
+                continue
+            results[name] = stats
+            print(f"{name}: {fmt(stats)}")
+            if "reference" in stats:
+                print(f"{name} (hand-written C++): {fmt(stats["reference"])}")
+    if baseline_file_name is not None:
+        with open(baseline_file_name, "r") as baseline_file:
+            compare(results, json.load(baseline_file))
+    if out_file_name is not None:
+        with open(out_file_name, "w") as out_file:
+            json.dump(results, out_file, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    code = main()
+    sys.exit(code)
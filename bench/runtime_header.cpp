@@ -0,0 +1,96 @@
+// Microbenchmarks of the runtime header.
+// Compares wl::String, the std::string wrapper, with wl::StringView and wl::SharedString,
+// and plain new/delete with wl::Arena.
+//
+// Build and run from the repository root:
+//     g++ -O2 -I . bench/runtime_header.cpp -o runtime_header && ./runtime_header
+#include "lib/waterlang.hpp"
+#include <chrono>
+#include <cstdio>
+
+// Keeps the compiler from optimizing the measured work away.
+template <typename T>
+static void sink(T& value) {
+    asm volatile("" : : "r"(&value) : "memory");
+}
+
+template <typename F>
+static void bench(const char* name, long iterations, F body) {
+    // Warmup.
+    for (long i = 0; i < iterations / 10; i++) {
+        body();
+    }
+    auto start = std::chrono::steady_clock::now();
+    for (long i = 0; i < iterations; i++) {
+        body();
+    }
+    auto end = std::chrono::steady_clock::now();
+    double ns = std::chrono::duration<double, std::nano>(end - start).count() / iterations;
+    std::printf("%-40s %8.2f ns/op\n", name, ns);
+}
+
+struct Pair
+{
+    wl::Int a;
+    wl::Int b;
+};
+
+int main()
+{
+    const long n = 10000000;
+    static const char short_literal[] = "hello";
+    static const char long_literal[] = "a literal that is too long to be stored inline";
+
+    std::printf("sizeof(wl::String) = %zu, sizeof(wl::StringView) = %zu, sizeof(wl::SharedString) = %zu\n\n",
+                sizeof(wl::String), sizeof(wl::StringView), sizeof(wl::SharedString));
+
+    bench("String from short literal", n, [&] { wl::String s(short_literal); sink(s); });
+    bench("StringView from short literal", n, [&] { wl::StringView s(short_literal); sink(s); });
+    bench("SharedString from short literal", n, [&] { wl::SharedString s(short_literal); sink(s); });
+    bench("String from long literal", n, [&] { wl::String s(long_literal); sink(s); });
+    bench("StringView from long literal", n, [&] { wl::StringView s(long_literal); sink(s); });
+    bench("SharedString from long literal", n, [&] { wl::SharedString s(long_literal); sink(s); });
+
+    wl::String string(long_literal);
+    wl::SharedString shared(long_literal);
+    bench("String copy (long)", n, [&] { wl::String s(string); sink(s); });
+    bench("SharedString copy (long)", n, [&] { wl::SharedString s(shared); sink(s); });
+    std::printf("\n");
+
+    const long objects = 64;
+    bench("new/delete 64 objects", n / objects, [&] {
+        Pair* pairs[objects];
+        for (long i = 0; i < objects; i++) {
+            pairs[i] = new Pair{ i, i };
+            sink(pairs[i]);
+        }
+        for (long i = 0; i < objects; i++) {
+            delete pairs[i];
+        }
+    });
+    bench("Arena 64 objects", n / objects, [&] {
+        wl::Arena arena;
+        for (long i = 0; i < objects; i++) {
+            Pair* pair = arena.make<Pair>(Pair{ i, i });
+            sink(pair);
+        }
+    });
+    bench("new/delete 64 SharedStrings", n / objects, [&] {
+        wl::SharedString* strings[objects];
+        for (long i = 0; i < objects; i++) {
+            strings[i] = new wl::SharedString(short_literal);
+            sink(strings[i]);
+        }
+        for (long i = 0; i < objects; i++) {
+            delete strings[i];
+        }
+    });
+    bench("Arena 64 SharedStrings", n / objects, [&] {
+        wl::Arena arena;
+        for (long i = 0; i < objects; i++) {
+            wl::SharedString* s = arena.make<wl::SharedString>(short_literal);
+            sink(s);
+        }
+    });
+    return 0;
+}
@@ -0,0 +1,117 @@
+"""
+Startup benchmark of the command line compiler.
+
+Runs `main.py <example> <out> --check`, and the zipapp built by tools/build_zipapp.py if given,
+and records the median wall time together with the import times reported by `python -X importtime`.
+Results can be saved as JSON and compared against an earlier run, so that startup regressions show up.
+"""
+import json
+import os
+import statistics
+import subprocess as sp
+import sys
+import tempfile
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+EXAMPLE = os.path.join(ROOT_DIR, "examples", "basic.wl")
+
+def usage(program_name) -> None:
+    print(f"""
+{program_name} [PARAMS...]
+Parameters:
+--runs=N        timed runs of every entry point, defaults to 20
+--pyz=FILE      also measure this zipapp
+--out=FILE      save the results as JSON
+--baseline=FILE compare the results with an earlier run
+          """)
+
+def command(entry_point: str, out_file_name: str) -> list[str]:
+    return [sys.executable, entry_point, EXAMPLE, out_file_name, "--check"]
+
+def wall_time(cmd: list[str], runs: int) -> dict:
+    # The first run writes bytecode caches, it shouldn't count.
+    sp.run(cmd, stdout=sp.DEVNULL, check=True)
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        sp.run(cmd, stdout=sp.DEVNULL, check=True)
+        samples.append(time.perf_counter() - start)
+    return {
+        "median": statistics.median(samples),
+        "p95": statistics.quantiles(samples, n=20)[18] if len(samples) > 1 else samples[0],
+    }
+
+def import_times(cmd: list[str]) -> dict:
+    """
+    Returns the cumulative import time of every top-level import in microseconds, and their total.
+    """
+    res = sp.run([cmd[0], "-X", "importtime"] + cmd[1:], stdout=sp.DEVNULL, stderr=sp.PIPE, check=True)
+    imports = {}
+    for line in res.stderr.decode("utf8").splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, cumulative, name = line.removeprefix("import time:").split("|")
+        # Nested imports are indented, and are already part of the cumulative time of their parent.
+        if name.startswith("  "):
+            continue
+        imports[name.strip()] = int(cumulative)
+    return {"total": sum(imports.values()), "imports": imports}
+
+def bench(entry_point: str, runs: int) -> dict:
+    with tempfile.TemporaryDirectory() as out_dir:
+        cmd = command(entry_point, os.path.join(out_dir, "out"))
+        stats = wall_time(cmd, runs)
+        stats["importtime"] = import_times(cmd)
+    return stats
+
+def main() -> int:
+    args = sys.argv
+    runs = 20
+    pyz = None
+    out_file_name = None
+    baseline_file_name = None
+    for param in args[1:]:
+        match param.split("=", 1):
+            case ["--runs", n]:
+                runs = int(n)
+            case ["--pyz", name]:
+                pyz = name
+            case ["--out", name]:
+                out_file_name = name
+            case ["--baseline", name]:
+                baseline_file_name = name
+            case ["--help"]:
+                usage(args[0])
+                return 0
+            case _:
+                usage(args[0])
+                print(f"ERROR: unknown parameter {param}")
+                return 2
+    entry_points = {"main.py": os.path.join(ROOT_DIR, "main.py")}
+    if pyz is not None:
+        entry_points["pyz"] = pyz
+    results = {}
+    for name, entry_point in entry_points.items():
+        stats = bench(entry_point, runs)
+        results[name] = stats
+        print(f"{name}: median {stats["median"] * 1000:.1f} ms, p95 {stats["p95"] * 1000:.1f} ms, "
+              f"imports {stats["importtime"]["total"] / 1000:.1f} ms")
+        slowest = sorted(stats["importtime"]["imports"].items(), key=lambda item: -item[1])[:5]
+        for module, us in slowest:
+            print(f"    {module}: {us / 1000:.1f} ms")
+    if baseline_file_name is not None:
+        with open(baseline_file_name, "r") as baseline_file:
+            baseline = json.load(baseline_file)
+        for name, stats in results.items():
+            if name in baseline:
+                change = (stats["median"] - baseline[name]["median"]) / baseline[name]["median"] * 100
+                print(f"{name}: median {change:+.1f}% against baseline")
+    if out_file_name is not None:
+        with open(out_file_name, "w") as out_file:
+            json.dump(results, out_file, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    code = main()
+    sys.exit(code)
@@ -1,4 +1,9 @@
 #include <string>
+#include <cstdint>
+#include <cstring>
+#include <new>
+#include <type_traits>
+#include <utility>
 
 // This namespace represents objects of Waterlang.
 // Currently, all classes (well one) that represents various types
@@ -45,4 +50,200 @@ private:
     Int size;
 };
 
-}
\ No newline at end of file
+// Everything below is the allocation-light part of the runtime.
+// None of these classes derive from Value, so they don't carry a vtable pointer.
+
+// A non-owning view of a string. String literals live for the whole program,
+// so they can be used through a view without being copied.
+class StringView
+{
+public:
+    // The length of a literal is computed at compile time.
+    constexpr StringView(StringLiteral literal)
+        : ptr(literal), len(std::char_traits<char>::length(literal)) {}
+
+    constexpr StringView(const char* data, std::size_t size)
+        : ptr(data), len(size) {}
+
+    constexpr Int Size() const { return (Int)len; }
+
+    constexpr const char* data() const { return ptr; }
+
+private:
+    const char* ptr;
+    std::size_t len;
+};
+
+// An owned string with small-string storage and copy-on-write.
+// Strings of up to SmallCapacity characters are stored inline and never allocate;
+// longer ones live in a reference counted buffer that copies share until one of them is written to.
+// The reference count is not atomic, Waterlang programs are single threaded.
+class SharedString
+{
+public:
+    static constexpr std::size_t SmallCapacity = 15;
+
+    SharedString(StringView s) { init(s.data(), (std::size_t)s.Size()); }
+
+    SharedString(const SharedString& other) : len(other.len) {
+        if (other.is_small()) {
+            std::memcpy(storage.small, other.storage.small, len + 1);
+        } else {
+            storage.heap = other.storage.heap;
+            storage.heap->refs++;
+        }
+    }
+
+    SharedString(SharedString&& other) noexcept : len(other.len), storage(other.storage) {
+        other.len = 0;
+        other.storage.small[0] = '\0';
+    }
+
+    SharedString& operator=(SharedString other) noexcept {
+        std::swap(len, other.len);
+        std::swap(storage, other.storage);
+        return *this;
+    }
+
+    ~SharedString() { release(); }
+
+    Int Size() const { return (Int)len; }
+
+    const char* data() const { return is_small() ? storage.small : storage.heap->chars(); }
+
+    StringView view() const { return StringView(data(), len); }
+
+    // Gives write access to the characters, copying them first if they are shared.
+    char* mutable_data() {
+        if (is_small()) {
+            return storage.small;
+        }
+        if (storage.heap->refs > 1) {
+            Heap* copy = Heap::create(storage.heap->chars(), len);
+            storage.heap->refs--;
+            storage.heap = copy;
+        }
+        return storage.heap->chars();
+    }
+
+private:
+    struct Heap
+    {
+        std::size_t refs;
+
+        char* chars() { return reinterpret_cast<char*>(this + 1); }
+
+        static Heap* create(const char* data, std::size_t size) {
+            Heap* heap = static_cast<Heap*>(::operator new(sizeof(Heap) + size + 1));
+            heap->refs = 1;
+            std::memcpy(heap->chars(), data, size);
+            heap->chars()[size] = '\0';
+            return heap;
+        }
+    };
+
+    bool is_small() const { return len <= SmallCapacity; }
+
+    void init(const char* data, std::size_t size) {
+        len = size;
+        if (is_small()) {
+            std::memcpy(storage.small, data, size);
+            storage.small[size] = '\0';
+        } else {
+            storage.heap = Heap::create(data, size);
+        }
+    }
+
+    void release() {
+        if (!is_small() && --storage.heap->refs == 0) {
+            ::operator delete(storage.heap);
+        }
+    }
+
+    std::size_t len;
+    union Storage
+    {
+        char small[SmallCapacity + 1];
+        Heap* heap;
+    } storage;
+};
+
+// A bump allocator for the objects of a single function call.
+// Everything allocated from it is freed at once when the arena goes out of scope,
+// and destructors run in the reverse order of construction.
+class Arena
+{
+public:
+    explicit Arena(std::size_t chunk_size = 4096)
+        : chunks(nullptr), cur(nullptr), end(nullptr), chunk_size(chunk_size), finalizers(nullptr) {}
+
+    Arena(const Arena&) = delete;
+    Arena& operator=(const Arena&) = delete;
+
+    ~Arena() {
+        for (Finalizer* f = finalizers; f != nullptr; f = f->next) {
+            f->destroy(f->object);
+        }
+        while (chunks != nullptr) {
+            Chunk* next = chunks->next;
+            ::operator delete(chunks);
+            chunks = next;
+        }
+    }
+
+    void* allocate(std::size_t size, std::size_t align) {
+        std::uintptr_t p = align_up((std::uintptr_t)cur, align);
+        if (cur == nullptr || p + size > (std::uintptr_t)end) {
+            grow(size + align);
+            p = align_up((std::uintptr_t)cur, align);
+        }
+        cur = reinterpret_cast<char*>(p + size);
+        return reinterpret_cast<void*>(p);
+    }
+
+    template <typename T, typename... Args>
+    T* make(Args&&... args) {
+        T* object = new (allocate(sizeof(T), alignof(T))) T(std::forward<Args>(args)...);
+        if constexpr (!std::is_trivially_destructible_v<T>) {
+            void* slot = allocate(sizeof(Finalizer), alignof(Finalizer));
+            finalizers = new (slot) Finalizer{ [](void* o) { static_cast<T*>(o)->~T(); }, object, finalizers };
+        }
+        return object;
+    }
+
+private:
+    struct Chunk
+    {
+        Chunk* next;
+        std::size_t size;
+    };
+
+    struct Finalizer
+    {
+        void (*destroy)(void*);
+        void* object;
+        Finalizer* next;
+    };
+
+    static std::uintptr_t align_up(std::uintptr_t p, std::size_t align) {
+        return (p + align - 1) & ~(std::uintptr_t)(align - 1);
+    }
+
+    void grow(std::size_t min_size) {
+        std::size_t size = min_size > chunk_size ? min_size : chunk_size;
+        Chunk* chunk = static_cast<Chunk*>(::operator new(sizeof(Chunk) + size));
+        chunk->next = chunks;
+        chunk->size = size;
+        chunks = chunk;
+        cur = reinterpret_cast<char*>(chunk + 1);
+        end = cur + size;
+    }
+
+    Chunk* chunks;
+    char* cur;
+    char* end;
+    std::size_t chunk_size;
+    Finalizer* finalizers;
+};
+
+}
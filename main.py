@@ -1,11 +1,17 @@
-from waterlang.parser import FuncDecl
-from waterlang.lexer import Lexer
-from waterlang.parser import Parser
-from waterlang.translator import Translator
+from waterlang.api import CompileError, CompileOptions, Stage, compile_file
+from typing import TYPE_CHECKING
 import sys
-import subprocess as sp
+if TYPE_CHECKING:
+    from waterlang.lang_objects import FuncDecl
 
-def print_ast(ast: list[FuncDecl]) -> None:
+EXIT_CODES = {
+    Stage.Lex: 3,
+    Stage.Parse: 4,
+    Stage.Translate: 5,
+    Stage.Compile: 1,
+}
+
+def print_ast(ast: "list[FuncDecl]") -> None:
     for fdecl in ast:
         print("-------")
         print(fdecl)
@@ -17,6 +23,19 @@ Parameters:
 --check         check the correctness of the program without compilation
 --cpp           don't remove the c++ source 
 --no-compile    don't compile the c++ source. implies --cpp
+--no-main       don't require a main function
+--no-opt        don't run the optimization passes on the IR
+--ir            print the IR that the c++ source is emitted from
+--pass-stats    print how many changes each optimization pass made and how long it took
+--export=F,G    keep functions F and G even if main doesn't reach them
+--watch         rebuild every time the input file or lib/waterlang.hpp changes
+--pgo           build with profile-guided optimization, training on the inputs from --pgo-train.
+                the profile is kept in the cache and reused while the source and the training inputs don't change
+--pgo-train=F,G run the program with F and G as stdin to collect the profile
+--pgo-runs=N    how many times the training workload is run, defaults to 5
+--interpret     run main with the python backend instead of compiling it. exits with its result
+--keep-unused   don't remove functions that are unreachable from main and the exports.
+                this is the default for --no-main builds without --export
           """)
 
 
@@ -26,6 +45,16 @@ def main() -> int:
     compile_cpp = True
     check_only = False
     no_main = False
+    optimize = True
+    print_ir = False
+    print_pass_stats = False
+    exports: list[str] = []
+    keep_unused = False
+    interpret = False
+    watch = False
+    pgo = False
+    pgo_training: list[str] = []
+    pgo_runs = 5
     if len(args) < 3:
         try:
             if args[1] == "--help":
@@ -53,6 +82,31 @@ def main() -> int:
                     compile_cpp = False
                 case "--no-main":
                     no_main = True
+                case "--no-opt":
+                    optimize = False
+                case "--ir":
+                    print_ir = True
+                case "--pass-stats":
+                    print_pass_stats = True
+                case "--keep-unused":
+                    keep_unused = True
+                case "--interpret":
+                    interpret = True
+                case "--watch":
+                    watch = True
+                case "--pgo":
+                    pgo = True
+                case _ if param.startswith("--pgo-train="):
+                    pgo_training += [name for name in param.removeprefix("--pgo-train=").split(",") if name]
+                case _ if param.startswith("--pgo-runs="):
+                    try:
+                        pgo_runs = int(param.removeprefix("--pgo-runs="))
+                    except ValueError:
+                        usage(args[0])
+                        print(f"ERROR: invalid number of runs in {param}")
+                        return 2
+                case _ if param.startswith("--export="):
+                    exports += [name for name in param.removeprefix("--export=").split(",") if name]
                 case "--help":
                     usage(args[0])
                     return 0
@@ -62,54 +116,91 @@ def main() -> int:
                     return 2
     if not compile_cpp:
         remove_cpp_source = False
-    with open(in_file_name, "r") as in_file:
-        lexer = Lexer(in_file, in_file_name)
-        lexer.lex()
-    result = lexer.report()
+    if pgo and (no_main or not compile_cpp):
+        usage(args[0])
+        print("ERROR: --pgo requires an executable build")
+        return 2
+    if pgo and watch:
+        usage(args[0])
+        print("ERROR: --pgo can't be combined with --watch")
+        return 2
+    if watch and (interpret or print_ir or print_pass_stats):
+        usage(args[0])
+        print("ERROR: --watch can't be combined with --interpret, --ir or --pass-stats")
+        return 2
+    if pgo_runs < 1:
+        usage(args[0])
+        print("ERROR: --pgo-runs requires at least one run")
+        return 2
+    if interpret and no_main:
+        usage(args[0])
+        print("ERROR: --interpret requires a main function")
+        return 2
+    options = CompileOptions(
+        file_name=in_file_name,
+        has_main=not no_main,
+        optimize=optimize,
+        exports=tuple(exports),
+        keep_unused=keep_unused,
+        check_only=check_only or interpret,
+        output=(out_file_name + ".so" if no_main else out_file_name) if compile_cpp and not pgo else None,
+    )
+    if watch:
+        from waterlang.watch import Watcher
+        Watcher(in_file_name, options, None if remove_cpp_source else out_file_name + ".cpp").run()
+        return 0
+    result = compile_file(in_file_name, options)
+    for diagnostic in result.diagnostics:
+        print(diagnostic)
+    if result.cpp is not None and (not remove_cpp_source or not result.success):
+        # The waterlang cli will leave the C++ file intact even if the --cpp option is not set.
+        # This is because all of the analysis must happen outside of translation,
+        # and if the translated code is wrong, then the waterlang compiler is not working correctly.
+        # Basically, this is done so that compiler bugs can be reported.
+        with open(out_file_name + ".cpp", "w") as out_file:
+            out_file.write(result.cpp)
     if not result.success:
-        for tok in result.tokens:
-            print("ERROR:", tok.loc, tok.value)
-            return 3
-    parser = Parser(result.tokens, not no_main)
-    try:
-        parser.parse()
-    except BaseException as e:
-        print("ERROR:", e)
-        return 4
+        return EXIT_CODES[result.diagnostics[0].stage]
     if check_only:
         print(f"Checking {in_file_name} finished successfully.")
         return 0
-    with open(out_file_name + ".cpp", "w") as out_file:
-        translator = Translator(parser.ast, out_file, not no_main)
+    if interpret:
+        from waterlang.pytranslator import PyModule, compile_ast
         try:
-            translator.translate()
-        except BaseException as e:
-            sp.run(["rm", out_file_name + ".cpp"])
-            print("ERROR:", e)
-            return 5
+            code = compile_ast(result.ast, in_file_name)
+        except CompileError as e:
+            for diagnostic in e.diagnostics:
+                print(diagnostic)
+            return EXIT_CODES[e.diagnostics[0].stage]
+        try:
+            module = PyModule(*code)
+            value = module.main()
+        except ArithmeticError as e:
+            print("ERROR (while running main):", e)
+            return 6
+        # The exit code of a process is truncated to a byte, same as for the compiled program.
+        return (value or 0) & 0xFF
+    for func in result.removed:
+        print(f"Removed unreachable function {func.func_name}")
+    if print_ir:
+        for func in result.ir:
+            print("-------")
+            print(func)
+    if print_pass_stats:
+        print("\n".join(str(stats) for stats in result.pass_stats.values()))
     if not remove_cpp_source:
         print(f"C++ code written to {out_file_name + ".cpp"}")
+    if pgo:
+        from waterlang.pgo import PgoBuilder
+        assert result.cpp is not None, "successful translation always produces C++ source"
+        try:
+            report = PgoBuilder(result.cpp, out_file_name, pgo_training, pgo_runs, include_dir=options.include_dir).build()
+        except BaseException as e:
+            print("ERROR (while building with PGO):", e)
+            return 7
+        print(report)
     if compile_cpp:
-        gpp_args = ["g++", "-I", ".", out_file_name + ".cpp", "-o", out_file_name, "-g"]
-        if no_main:
-            gpp_args[5] += ".so"
-            gpp_args += ["-c"]
-        gpp_result = sp.run(gpp_args, capture_output=True)
-        if gpp_result.returncode != 0:
-            # The waterlang cli will leave the C++ file intact even if the --cpp option is not set.
-            # This is because all of the analysis must happen outside of translation,
-            # and if the translated code is wrong, then the waterlang compiler is not working correctly.
-            # Basically, this is done so that compiler bugs can be reported.
-            print("ERROR (while compiling C++ source):\n", gpp_result.stderr.decode("utf8"))
-            return gpp_result.returncode
-        else:
-            print(f"Compilation successful: {out_file_name}")
-
-    if remove_cpp_source:
-        rm_result = sp.run(["rm", out_file_name + ".cpp"], capture_output=True)
-        if rm_result.returncode != 0:
-            print("ERROR (while deleting the c++ source):", rm_result.stderr.decode("utf8"))
-            return rm_result.returncode
+        print(f"Compilation successful: {out_file_name}")
 
     return 0
 
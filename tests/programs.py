@@ -0,0 +1,93 @@
+import random
+
+def generate(seed: int, length: int = 30) -> str:
+    """
+    Generates a random main function with nested blocks, shadowing, reassignments,
+    negation and division. Values are tracked while generating and kept small,
+    so the program never overflows or divides by zero and its result is well defined in C++.
+    """
+    rng = random.Random(seed)
+    lines = ["func main() -> int is", "begin"]
+    scopes: list[dict[str, int]] = [{}]
+    counter = 0
+
+    def visible() -> dict[str, int]:
+        merged: dict[str, int] = {}
+        for scope in scopes:
+            merged.update(scope)
+        return merged
+
+    def operand(declaring: str | None) -> tuple[str, int]:
+        values = visible()
+        # In C++ a declaration is in scope in its own initializer, so the variable being declared is never read.
+        values.pop(declaring, None)
+        if values and rng.random() < 0.6:
+            name = rng.choice(list(values))
+            return name, values[name]
+        n = rng.randint(0, 50)
+        return str(n), n
+
+    def expr(declaring: str | None = None) -> tuple[str, int]:
+        text, value = operand(declaring)
+        for _ in range(rng.randint(0, 3)):
+            op = rng.choice("+-*/")
+            rhs, rhs_value = operand(declaring)
+            if op == "*":
+                rhs_value = rng.randint(-9, 9)
+                rhs = f"({rhs_value})" if rhs_value < 0 else str(rhs_value)
+            if op == "/" and rhs_value == 0:
+                op = "+"
+            text = f"({text} {op} {rhs})"
+            match op:
+                case "+":
+                    value += rhs_value
+                case "-":
+                    value -= rhs_value
+                case "*":
+                    value *= rhs_value
+                case "/":
+                    quotient = abs(value) // abs(rhs_value)
+                    value = quotient if (value < 0) == (rhs_value < 0) else -quotient
+        if rng.random() < 0.2:
+            text = f"-({text})"
+            value = -value
+        if abs(value) > 10**9:
+            text = f"({text} / 1000)"
+            quotient = abs(value) // 1000
+            value = quotient if value >= 0 else -quotient
+        return text, value
+
+    for _ in range(length):
+        indent = "    " * len(scopes)
+        roll = rng.random()
+        if roll < 0.1 and len(scopes) < 4:
+            lines.append(f"{indent}begin")
+            scopes.append({})
+        elif roll < 0.2 and len(scopes) > 1:
+            scopes.pop()
+            lines.append(f"{'    ' * len(scopes)}end")
+        elif roll < 0.45 and visible():
+            name = rng.choice(list(visible()))
+            text, value = expr()
+            lines.append(f"{indent}{name} = {text};")
+            for scope in reversed(scopes):
+                if name in scope:
+                    scope[name] = value
+                    break
+        else:
+            # Reuse names now and then, so that inner blocks shadow outer variables.
+            name = f"v{rng.randint(0, counter)}" if counter and rng.random() < 0.2 else f"v{counter}"
+            counter += 1
+            if name in scopes[-1]:
+                name = f"v{counter}"
+                counter += 1
+            text, value = expr(name)
+            lines.append(f"{indent}var {name}: int = {text};")
+            scopes[-1][name] = value
+    while len(scopes) > 1:
+        scopes.pop()
+        lines.append(f"{'    ' * len(scopes)}end")
+    text, _ = expr()
+    lines.append(f"    return {text};")
+    lines.append("end func")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,92 @@
+from waterlang.api import CompileOptions, Stage, compile_source
+from waterlang.consteval import ConstEvaluator
+from waterlang.ir import InstrType, lower
+from waterlang.pytranslator import parse
+import os
+import shutil
+import subprocess as sp
+import tempfile
+import unittest
+
+def ret_values(source: str, options: CompileOptions = CompileOptions()) -> dict[str, list]:
+    result = compile_source(source, options)
+    assert result.success, result.diagnostics
+    return {func.func_name: [(instr.tag, instr.args) for instr in func.instrs] for func in result.ir}
+
+class TestConstEval(unittest.TestCase):
+    def test_folds_to_return_of_constant(self):
+        source = """
+func main() -> int is
+begin
+    var a: int = 6;
+    var b: int;
+    begin
+        b = 3;
+        var c: int = b;
+        b = c + 2;
+    end
+    const d: int = b + 36;
+    return a + d - b;
+end func
+"""
+        result = compile_source(source)
+        self.assertTrue(result.success)
+        [func] = result.ir
+        self.assertTrue(func.constexpr)
+        self.assertEqual([(instr.tag, instr.args) for instr in func.instrs], [(InstrType.Ret, [42])])
+        self.assertIn("constexpr wl::Int WL_Main()", result.cpp)
+
+    def test_division_truncates_towards_zero(self):
+        self.assertEqual(ret_values("func main() -> int is return -7 / 2;")["main"], [(InstrType.Ret, [-3])])
+
+    def test_overflow_is_reported(self):
+        source = """
+func main() -> int is
+begin
+    const big: int = 9223372036854775807;
+    return big + 1;
+end func
+"""
+        result = compile_source(source)
+        [diagnostic] = result.diagnostics
+        self.assertIs(diagnostic.stage, Stage.Translate)
+        self.assertIn("in function main", diagnostic.message)
+        self.assertIn("integer overflow", diagnostic.message)
+
+    def test_division_by_zero_is_reported(self):
+        result = compile_source("func main() -> int is return 6 / (3 - 3);")
+        [diagnostic] = result.diagnostics
+        self.assertIs(diagnostic.stage, Stage.Translate)
+        self.assertIn("division by zero", diagnostic.message)
+
+    def test_negated_int_min_literal(self):
+        source = "func main() -> int is return -9223372036854775808 / 2;"
+        self.assertEqual(ret_values(source)["main"], [(InstrType.Ret, [-4611686018427387904])])
+        self.assertTrue(compile_source(source, CompileOptions(optimize=False)).success)
+
+    def test_results_are_memoized(self):
+        funcs = lower(parse("func seven() -> int is return 3 + 4;"))
+        evaluator = ConstEvaluator(funcs)
+        self.assertEqual(evaluator.evaluate("seven"), 7)
+        funcs[0].instrs = []
+        self.assertEqual(evaluator.evaluate("seven"), 7)
+
+    def test_exported_functions_are_not_constexpr(self):
+        source = "func seven() -> int is return 7;\nfunc main() -> int is return 6;"
+        library = compile_source(source, CompileOptions(has_main=False))
+        self.assertNotIn("constexpr", library.cpp)
+        exported = compile_source(source, CompileOptions(exports=("seven",)))
+        self.assertIn("\nwl::Int seven()", exported.cpp)
+        self.assertIn("constexpr wl::Int WL_Main()", exported.cpp)
+
+    @unittest.skipUnless(shutil.which("g++") and shutil.which("nm"), "needs g++ and nm")
+    def test_library_exports_symbols(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            output = os.path.join(tmp_dir, "lib.so")
+            result = compile_source("func test() -> int is return 6;", CompileOptions(has_main=False, output=output))
+            self.assertTrue(result.success, result.diagnostics)
+            symbols = sp.run(["nm", "-C", output], capture_output=True, check=True).stdout.decode("utf8")
+        self.assertIn("T test()", symbols)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,127 @@
+from waterlang.api import CompileOptions, Stage, compile_source
+from waterlang.lang_objects import ValueType
+from waterlang.ir import (
+    INT_MAX, Instr, InstrType, IRFunction, PassManager,
+    common_subexpression_elimination, constant_propagation, copy_propagation, dead_store_elimination,
+)
+from waterlang.lexer import Op
+from tests.programs import generate
+import os
+import shutil
+import subprocess as sp
+import tempfile
+import unittest
+
+def func(*instrs: Instr) -> IRFunction:
+    return IRFunction("f", ValueType.Int, list(instrs))
+
+def binary(dest: str, op: Op, lhs, rhs) -> Instr:
+    return Instr(InstrType.Binary, dest, [lhs, rhs], op)
+
+def copy(dest: str, src) -> Instr:
+    return Instr(InstrType.Copy, dest, [src])
+
+def ret(src) -> Instr:
+    return Instr(InstrType.Ret, None, [src])
+
+def listing(f: IRFunction) -> list[str]:
+    return [str(instr) for instr in f.instrs]
+
+class TestPasses(unittest.TestCase):
+    def test_copy_propagation(self):
+        f = func(copy("x_0", "p"), copy("y_0", "x_0"), binary("t0", Op.PLUS, "y_0", 3), ret("t0"))
+        self.assertEqual(copy_propagation(f), 2)
+        self.assertEqual(listing(f), ["x_0 = copy p", "y_0 = copy p", "t0 = plus p, 3", "ret t0"])
+        self.assertEqual(copy_propagation(f), 0)
+
+    def test_constant_propagation(self):
+        f = func(binary("t0", Op.PLUS, 2, 3), copy("x_0", "t0"), binary("t1", Op.STAR, "x_0", "p"), ret("t1"))
+        # One fold and two uses replaced.
+        self.assertEqual(constant_propagation(f), 3)
+        self.assertEqual(listing(f), ["t0 = copy 5", "x_0 = copy 5", "t1 = star 5, p", "ret t1"])
+
+    def test_constant_propagation_truncates_division(self):
+        f = func(Instr(InstrType.Neg, "t0", [7]), binary("t1", Op.SLASH, "t0", 2), ret("t1"))
+        constant_propagation(f)
+        self.assertEqual(listing(f), ["t0 = copy -7", "t1 = copy -3", "ret -3"])
+
+    def test_constant_propagation_leaves_traps_for_run_time(self):
+        f = func(binary("t0", Op.PLUS, INT_MAX, 1), binary("t1", Op.SLASH, 1, 0), ret("t1"))
+        self.assertEqual(constant_propagation(f), 0)
+        self.assertEqual(listing(f), [f"t0 = plus {INT_MAX}, 1", "t1 = slash 1, 0", "ret t1"])
+
+    def test_common_subexpression_elimination(self):
+        f = func(
+            binary("t0", Op.PLUS, "p", "q"),
+            binary("t1", Op.PLUS, "q", "p"),
+            binary("t2", Op.MINUS, "p", "q"),
+            binary("t3", Op.MINUS, "q", "p"),
+            ret("t3"),
+        )
+        self.assertEqual(common_subexpression_elimination(f), 1)
+        self.assertEqual(listing(f), ["t0 = plus p, q", "t1 = copy t0", "t2 = minus p, q", "t3 = minus q, p", "ret t3"])
+
+    def test_dead_store_elimination(self):
+        f = func(copy("x_0", 1), copy("x_1", "p"), binary("t0", Op.PLUS, "x_1", "x_1"), copy("y_0", "t0"), ret("x_1"))
+        self.assertEqual(dead_store_elimination(f), 3)
+        self.assertEqual(listing(f), ["x_1 = copy p", "ret x_1"])
+
+    def test_pass_manager_runs_to_fixpoint(self):
+        f = func(
+            copy("x_0", "p"),
+            binary("t0", Op.PLUS, "x_0", 1),
+            binary("t1", Op.PLUS, "p", 1),
+            binary("t2", Op.STAR, "t0", "t1"),
+            ret("t2"),
+        )
+        manager = PassManager()
+        manager.run([f])
+        self.assertEqual(listing(f), ["t0 = plus p, 1", "t2 = star t0, t0", "ret t2"])
+        # Two iterations that change something, CSE and DSE and then copy propagation of t1,
+        # and one that confirms the fixpoint.
+        self.assertEqual({stats.runs for stats in manager.stats.values()}, {3})
+        self.assertEqual(manager.stats["common_subexpression_elimination"].changes, 1)
+        self.assertEqual(manager.stats["dead_store_elimination"].changes, 2)
+
+    def test_pass_manager_stops_after_max_iterations(self):
+        calls = []
+
+        def always_changes(f: IRFunction) -> int:
+            calls.append(f)
+            return 1
+
+        manager = PassManager(passes=[always_changes], max_iterations=3)
+        manager.run([func(ret(0))])
+        self.assertEqual(len(calls), 3)
+        self.assertEqual(manager.stats["always_changes"].changes, 3)
+
+class TestLowering(unittest.TestCase):
+    def test_uninitialized_shadowed_variable_is_reported(self):
+        source = "func main() -> int is begin var x: int; begin var x: int = 5; end return x; end func"
+        result = compile_source(source, CompileOptions(file_name="shadow.wl"))
+        [diagnostic] = result.diagnostics
+        self.assertIs(diagnostic.stage, Stage.Translate)
+        self.assertEqual(diagnostic.message, "at shadow.wl:1:74: use of uninitialized variable x")
+
+@unittest.skipUnless(shutil.which("g++"), "needs g++")
+class TestOptimizedBuilds(unittest.TestCase):
+    def run_program(self, source: str, optimize: bool, tmp_dir: str) -> int:
+        output = os.path.join(tmp_dir, "opt" if optimize else "no_opt")
+        result = compile_source(source, CompileOptions(optimize=optimize, output=output))
+        self.assertTrue(result.success, result.diagnostics)
+        return sp.run([output]).returncode
+
+    def test_optimized_and_unoptimized_builds_agree(self):
+        root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        sources = []
+        for path in ["basic.wl", "blocks.wl", "vardecl.wl"]:
+            with open(os.path.join(root_dir, "examples", path), "r") as in_file:
+                sources.append(in_file.read())
+        sources += [generate(seed) for seed in range(10)]
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for source in sources:
+                with self.subTest(source=source):
+                    self.assertEqual(self.run_program(source, True, tmp_dir), self.run_program(source, False, tmp_dir))
+
+if __name__ == "__main__":
+    unittest.main()
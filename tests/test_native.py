@@ -0,0 +1,45 @@
+from waterlang import native
+from waterlang.api import CompileError, Stage
+import os
+import shutil
+import tempfile
+import unittest
+
+@unittest.skipUnless(shutil.which("g++"), "needs g++")
+class TestNative(unittest.TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def test_functions_named_like_libc(self):
+        module = native.load("func abs() -> int is return 2;\nfunc exit() -> int is return 3;", cache_dir=self.cache_dir)
+        self.assertEqual((module.abs(), module.exit()), (2, 3))
+
+    def test_loaded_modules_are_cached(self):
+        source = "func main() -> int is return 1 + 2;"
+        module = native.load(source, cache_dir=self.cache_dir)
+        self.assertEqual(module.main(), 3)
+        self.assertIs(native.load(source, cache_dir=self.cache_dir), module)
+
+    def test_cache_dirs_are_kept_apart(self):
+        source = "func main() -> int is return 4;"
+        module = native.load(source, cache_dir=self.cache_dir)
+        with tempfile.TemporaryDirectory() as other_dir:
+            other = native.load(source, cache_dir=other_dir)
+            self.assertIsNot(other, module)
+            self.assertEqual(os.path.dirname(other.path), other_dir)
+            self.assertEqual(other.main(), 4)
+
+class TestNativeErrors(unittest.TestCase):
+    def test_errors_are_exceptions(self):
+        with self.assertRaises(Exception) as context:
+            native.translate("func main( -> int is return 1;", "broken.wl")
+        self.assertIsInstance(context.exception, CompileError)
+        [diagnostic] = context.exception.diagnostics
+        self.assertIs(diagnostic.stage, Stage.Parse)
+        self.assertIn("broken.wl", str(context.exception))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+from waterlang.api import CompileOptions, compile_file
+from waterlang.pgo import PgoBuilder
+import os
+import shutil
+import subprocess as sp
+import sys
+import tempfile
+import unittest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def run_main(*params: str, env: dict[str, str] | None = None) -> sp.CompletedProcess:
+    args = [sys.executable, os.path.join(ROOT_DIR, "main.py")] + list(params)
+    return sp.run(args, capture_output=True, timeout=120, env=env)
+
+class TestPgo(unittest.TestCase):
+    def test_profile_depends_on_training_inputs(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            training_input = os.path.join(tmp_dir, "train.txt")
+
+            def work_dir(content: str, training_inputs: list[str]) -> str:
+                with open(training_input, "w") as training_file:
+                    training_file.write(content)
+                return PgoBuilder("int main() {}", "out", training_inputs, cache_dir=tmp_dir).work_dir
+
+            self.assertEqual(work_dir("1", [training_input]), work_dir("1", [training_input]))
+            self.assertNotEqual(work_dir("1", [training_input]), work_dir("2", [training_input]))
+            self.assertNotEqual(work_dir("1", [training_input]), work_dir("1", []))
+
+    def test_watch_is_rejected(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            result = run_main(os.path.join(ROOT_DIR, "examples", "basic.wl"), os.path.join(tmp_dir, "out"), "--pgo", "--watch")
+        self.assertEqual(result.returncode, 2)
+        self.assertIn(b"--pgo can't be combined with --watch", result.stdout)
+
+    def test_runs_must_be_positive(self):
+        for runs in ["0", "-1"]:
+            with self.subTest(runs=runs), tempfile.TemporaryDirectory() as tmp_dir:
+                result = run_main(os.path.join(ROOT_DIR, "examples", "basic.wl"), os.path.join(tmp_dir, "out"),
+                                  "--pgo", f"--pgo-runs={runs}")
+                self.assertEqual(result.returncode, 2)
+                self.assertIn(b"--pgo-runs requires at least one run", result.stdout)
+
+    @unittest.skipUnless(shutil.which("g++"), "needs g++")
+    def test_build_reuses_profile(self):
+        in_file_name = os.path.join(ROOT_DIR, "examples", "basic.wl")
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            env = dict(os.environ, WATERLANG_CACHE=os.path.join(tmp_dir, "cache"))
+            expected = os.path.join(tmp_dir, "expected")
+            self.assertTrue(compile_file(in_file_name, CompileOptions(output=expected)).success)
+            output = os.path.join(tmp_dir, "out")
+            first = run_main(in_file_name, output, "--pgo", "--pgo-runs=1", env=env)
+            self.assertEqual(first.returncode, 0, first.stdout)
+            self.assertNotIn(b"reused profile", first.stdout)
+            self.assertEqual(sp.run([output]).returncode, sp.run([expected]).returncode)
+            second = run_main(in_file_name, output, "--pgo", "--pgo-runs=1", env=env)
+            self.assertEqual(second.returncode, 0, second.stdout)
+            self.assertIn(b"(reused profile)", second.stdout)
+            self.assertEqual(sp.run([output]).returncode, sp.run([expected]).returncode)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+from waterlang import pytranslator
+from waterlang.api import CompileError, CompileOptions, Stage, compile_source
+from waterlang.pytranslator import wl_rt_add, wl_rt_div, wl_rt_mul, wl_rt_neg, wl_rt_sub, wl_rt_wrap
+from tests.programs import generate
+import os
+import shutil
+import subprocess as sp
+import sys
+import tempfile
+import unittest
+
+INT_MIN = -2**63
+INT_MAX = 2**63 - 1
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+class TestRuntime(unittest.TestCase):
+    def test_division_truncates_towards_zero(self):
+        self.assertEqual(wl_rt_div(7, 2), 3)
+        self.assertEqual(wl_rt_div(-7, 2), -3)
+        self.assertEqual(wl_rt_div(7, -2), -3)
+        self.assertEqual(wl_rt_div(-7, -2), 3)
+        self.assertEqual(wl_rt_div(INT_MIN, 1), INT_MIN)
+
+    def test_int_min_divided_by_minus_one_traps(self):
+        with self.assertRaises(OverflowError):
+            wl_rt_div(INT_MIN, -1)
+
+    def test_division_by_zero_traps(self):
+        with self.assertRaises(ZeroDivisionError):
+            wl_rt_div(1, 0)
+
+    def test_wraparound(self):
+        self.assertEqual(wl_rt_add(INT_MAX, 1), INT_MIN)
+        self.assertEqual(wl_rt_sub(INT_MIN, 1), INT_MAX)
+        self.assertEqual(wl_rt_mul(INT_MAX, 2), -2)
+        self.assertEqual(wl_rt_mul(INT_MIN, -1), INT_MIN)
+        self.assertEqual(wl_rt_neg(INT_MIN), INT_MIN)
+        self.assertEqual(wl_rt_wrap(2**63), INT_MIN)
+        self.assertEqual(wl_rt_wrap(-2**63 - 1), INT_MAX)
+        self.assertEqual(wl_rt_add(-3, 5), 2)
+
+class TestParse(unittest.TestCase):
+    def test_errors_are_exceptions(self):
+        for source, stage in [("func main() -> int is return 1 $ 2;", Stage.Lex), ("func main( -> int is return 1;", Stage.Parse)]:
+            with self.subTest(source=source), self.assertRaises(CompileError) as context:
+                pytranslator.parse(source)
+            self.assertIs(context.exception.diagnostics[0].stage, stage)
+
+    def test_uninitialized_variable_is_a_compile_error(self):
+        with self.assertRaises(CompileError) as context:
+            pytranslator.load("func main() -> int is begin var x: int; begin var x: int = 5; end return x; end func")
+        self.assertIs(context.exception.diagnostics[0].stage, Stage.Translate)
+
+class TestInterpretFlag(unittest.TestCase):
+    def test_uninitialized_shadowed_variable_is_reported(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            in_file_name = os.path.join(tmp_dir, "shadow.wl")
+            with open(in_file_name, "w") as in_file:
+                in_file.write("func main() -> int is begin var x: int; begin var x: int = 5; end return x; end func")
+            result = sp.run([sys.executable, os.path.join(ROOT_DIR, "main.py"), in_file_name, os.path.join(tmp_dir, "out"), "--interpret"],
+                            capture_output=True)
+        self.assertEqual(result.returncode, 5)
+        self.assertIn(b"shadow.wl:1:74: use of uninitialized variable x", result.stdout)
+        self.assertNotIn(b"Traceback", result.stderr)
+
+    def test_no_main_is_rejected(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            args = [sys.executable, os.path.join(ROOT_DIR, "main.py"), os.path.join(ROOT_DIR, "examples", "no_main.wl"),
+                    os.path.join(tmp_dir, "out"), "--no-main", "--interpret"]
+            result = sp.run(args, capture_output=True)
+        self.assertEqual(result.returncode, 2)
+        self.assertIn(b"--interpret requires a main function", result.stdout)
+
+@unittest.skipUnless(shutil.which("g++"), "needs g++")
+class TestAgainstCpp(unittest.TestCase):
+    def test_python_backend_agrees_with_unoptimized_builds(self):
+        sources = []
+        for path in ["basic.wl", "blocks.wl", "vardecl.wl"]:
+            with open(os.path.join(ROOT_DIR, "examples", path), "r") as in_file:
+                sources.append(in_file.read())
+        sources += [generate(seed) for seed in range(20)]
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            output = os.path.join(tmp_dir, "out")
+            for source in sources:
+                with self.subTest(source=source):
+                    result = compile_source(source, CompileOptions(optimize=False, output=output))
+                    self.assertTrue(result.success, result.diagnostics)
+                    # The exit code of the binary is the result truncated to a byte.
+                    self.assertEqual(pytranslator.load(source).main() & 0xFF, sp.run([output]).returncode)
+
+if __name__ == "__main__":
+    unittest.main()
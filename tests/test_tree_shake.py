@@ -0,0 +1,58 @@
+from waterlang.api import CompileOptions, Stage, compile_source
+from waterlang.ir import lower, tree_shake
+from waterlang.pytranslator import parse
+import unittest
+
+SOURCE = """
+func helper() -> int is return 1;
+func unused() -> int is return 2;
+func main() -> int is return 3;
+"""
+
+def names(funcs) -> list[str]:
+    return [func.func_name for func in funcs]
+
+class TestTreeShake(unittest.TestCase):
+    def test_returns_unreachable_functions(self):
+        funcs = lower(parse(SOURCE))
+        self.assertEqual(names(tree_shake(funcs, ["main"])), ["helper", "unused"])
+        self.assertEqual(names(tree_shake(funcs, ["main", "helper"])), ["unused"])
+        self.assertEqual(names(tree_shake(funcs, ["main", "helper", "unused"])), [])
+
+    def test_unknown_root(self):
+        with self.assertRaisesRegex(BaseException, "exported function missing is not defined"):
+            tree_shake(lower(parse(SOURCE)), ["missing"])
+
+class TestCompileExports(unittest.TestCase):
+    def test_unreachable_functions_are_removed(self):
+        result = compile_source(SOURCE)
+        self.assertTrue(result.success, result.diagnostics)
+        self.assertEqual(names(result.ir), ["main"])
+        self.assertEqual(names(result.removed), ["helper", "unused"])
+        self.assertNotIn("helper", result.cpp)
+
+    def test_exports_are_kept(self):
+        result = compile_source(SOURCE, CompileOptions(exports=("helper",)))
+        self.assertEqual(names(result.ir), ["helper", "main"])
+        self.assertEqual(names(result.removed), ["unused"])
+
+    def test_library_exports_are_kept(self):
+        result = compile_source(SOURCE, CompileOptions(has_main=False, exports=("unused",)))
+        self.assertEqual(names(result.ir), ["unused"])
+        self.assertEqual(names(result.removed), ["helper", "main"])
+
+    def test_everything_is_kept(self):
+        for options in [CompileOptions(keep_unused=True), CompileOptions(has_main=False)]:
+            with self.subTest(options=options):
+                result = compile_source(SOURCE, options)
+                self.assertEqual(names(result.ir), ["helper", "unused", "main"])
+                self.assertEqual(result.removed, [])
+
+    def test_undefined_export_is_reported(self):
+        result = compile_source(SOURCE, CompileOptions(exports=("missing",)))
+        [diagnostic] = result.diagnostics
+        self.assertIs(diagnostic.stage, Stage.Translate)
+        self.assertEqual(diagnostic.message, "exported function missing is not defined")
+
+if __name__ == "__main__":
+    unittest.main()
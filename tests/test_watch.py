@@ -0,0 +1,71 @@
+from waterlang.api import CompileOptions
+from waterlang.watch import Watcher
+import contextlib
+import io
+import os
+import shutil
+import subprocess as sp
+import sys
+import tempfile
+import unittest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+class TestWatcher(unittest.TestCase):
+    def rebuild(self, source: str, options: CompileOptions = CompileOptions()) -> str:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            in_file_name = os.path.join(tmp_dir, "main.wl")
+            with open(in_file_name, "w") as in_file:
+                in_file.write(source)
+            watcher = Watcher(in_file_name, options)
+            out = io.StringIO()
+            with contextlib.redirect_stdout(out):
+                watcher.rebuild({in_file_name})
+        return out.getvalue()
+
+    def test_stamp_changes_with_size(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "main.wl")
+            self.assertIsNone(Watcher.stamp(path))
+            with open(path, "w") as out_file:
+                out_file.write("a")
+            old = Watcher.stamp(path)
+            # Keeps the modification time, so that only the size tells the two versions apart.
+            mtime_ns = os.stat(path).st_mtime_ns
+            with open(path, "w") as out_file:
+                out_file.write("ab")
+            os.utime(path, ns=(mtime_ns, mtime_ns))
+            self.assertNotEqual(Watcher.stamp(path), old)
+
+    def test_successful_rebuild(self):
+        out = self.rebuild("func unused() -> int is return 1;\nfunc main() -> int is return 2;")
+        self.assertIn("Removed unreachable function unused", out)
+        self.assertIn("Rebuilt", out)
+
+    def test_failed_frontend(self):
+        out = self.rebuild("func main( -> int is return 1;")
+        self.assertIn("ERROR", out)
+        self.assertIn("failed after", out)
+        self.assertNotIn("Rebuilt", out)
+
+    @unittest.skipUnless(shutil.which("g++"), "needs g++")
+    def test_failed_build(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            # g++ can't write into a directory that doesn't exist.
+            output = os.path.join(tmp_dir, "missing", "out")
+            out = self.rebuild("func main() -> int is return 2;", CompileOptions(output=output))
+        self.assertIn("ERROR (while compiling C++ source)", out)
+        self.assertIn("failed after", out)
+        self.assertNotIn("Rebuilt", out)
+
+    def test_cli_rejects_flags_it_would_ignore(self):
+        for flag in ["--interpret", "--ir", "--pass-stats"]:
+            with self.subTest(flag=flag), tempfile.TemporaryDirectory() as tmp_dir:
+                args = [sys.executable, os.path.join(ROOT_DIR, "main.py"), os.path.join(ROOT_DIR, "examples", "basic.wl"),
+                        os.path.join(tmp_dir, "out"), "--watch", flag]
+                result = sp.run(args, capture_output=True, timeout=30)
+                self.assertEqual(result.returncode, 2)
+                self.assertIn(b"--watch can't be combined with", result.stdout)
+
+if __name__ == "__main__":
+    unittest.main()
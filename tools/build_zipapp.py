@@ -0,0 +1,43 @@
+"""
+Builds waterlang.pyz, a single-file distribution of the compiler.
+
+The archive contains main.py as __main__.py and the waterlang package, precompiled for the
+interpreter that runs this script, and is stored uncompressed so that imports don't pay for inflating.
+The C++ build still needs lib/waterlang.hpp, which is looked up in $WATERLANG_HOME or the working directory.
+
+    python tools/build_zipapp.py [OUT]
+"""
+import compileall
+import py_compile
+import os
+import shutil
+import sys
+import tempfile
+import zipapp
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def build(out_file_name: str) -> None:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        shutil.copy(os.path.join(ROOT_DIR, "main.py"), os.path.join(tmp_dir, "__main__.py"))
+        shutil.copytree(
+            os.path.join(ROOT_DIR, "waterlang"),
+            os.path.join(tmp_dir, "waterlang"),
+            ignore=shutil.ignore_patterns("__pycache__"),
+        )
+        # zipimport can't use __pycache__, it only finds bytecode right next to the source.
+        # The archive is never edited in place, so the bytecode doesn't need to be checked against the source.
+        invalidation_mode = py_compile.PycInvalidationMode.UNCHECKED_HASH
+        if not compileall.compile_dir(tmp_dir, quiet=1, legacy=True, invalidation_mode=invalidation_mode):
+            raise BaseException("could not compile the sources to bytecode")
+        zipapp.create_archive(tmp_dir, out_file_name, interpreter="/usr/bin/env python3")
+
+def main() -> int:
+    out_file_name = sys.argv[1] if len(sys.argv) > 1 else "waterlang.pyz"
+    build(out_file_name)
+    print(f"Zipapp written to {out_file_name} (bytecode for Python {sys.version_info.major}.{sys.version_info.minor})")
+    return 0
+
+if __name__ == "__main__":
+    code = main()
+    sys.exit(code)
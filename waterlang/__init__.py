@@ -1 +1,9 @@
-from waterlang import lexer, parser, translator
\ No newline at end of file
+import importlib
+
+# Submodules are imported on first use, so that importing one of them doesn't import all of the others.
+__all__ = ["lexer", "parser", "translator"]
+
+def __getattr__(name: str):
+    if name in __all__:
+        return importlib.import_module(f"waterlang.{name}")
+    raise AttributeError(f"module waterlang has no attribute {name}")
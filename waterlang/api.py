@@ -0,0 +1,156 @@
+from waterlang.lang_objects import FuncDecl
+from waterlang.lexer import Lexer, Token
+from waterlang.parser import Parser
+from enum import Enum, auto
+from dataclasses import dataclass, field, replace
+from typing import List, Dict, TYPE_CHECKING
+import io
+import os
+# The translator and subprocess are imported where they are used, so that --check doesn't pay for them.
+if TYPE_CHECKING:
+    from waterlang.ir import IRFunction, PassStats
+
+# Directory that contains lib/waterlang.hpp.
+# Inside a zipapp there is no such directory, so the header is looked up from the working directory.
+ROOT_DIR = os.environ.get("WATERLANG_HOME", os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if not os.path.isdir(ROOT_DIR):
+    ROOT_DIR = os.getcwd()
+
+class Stage(Enum):
+    Lex = auto()
+    Parse = auto()
+    Translate = auto()
+    Compile = auto()
+
+@dataclass(frozen=True)
+class Diagnostic:
+    stage: Stage
+    message: str
+
+    def __str__(self):
+        if self.stage is Stage.Compile:
+            return f"ERROR (while compiling C++ source):\n {self.message}"
+        return f"ERROR: {self.message}"
+
+class CompileError(Exception):
+    """
+    Raised with the diagnostics of a failed compilation by the APIs that load a module instead of returning a CompileResult.
+    """
+    diagnostics: List[Diagnostic]
+
+    def __init__(self, diagnostics: List[Diagnostic]):
+        super().__init__("\n".join(diagnostic.message for diagnostic in diagnostics))
+        self.diagnostics = diagnostics
+
+@dataclass(frozen=True)
+class CompileOptions:
+    file_name: str = "<string>"
+    has_main: bool = True
+    optimize: bool = True
+    # Functions that are kept even if main doesn't reach them.
+    exports: tuple[str, ...] = ()
+    # Keep every function. Implied for modules without main and without exports.
+    keep_unused: bool = False
+    # Stop after parsing.
+    check_only: bool = False
+    # Give every function C linkage, so that the built library can be loaded with ctypes.
+    extern_c: bool = False
+    # If set, the C++ source is built with g++ into this path.
+    output: str | None = None
+    include_dir: str = ROOT_DIR
+
+    @property
+    def header(self) -> str:
+        return os.path.join(self.include_dir, "lib", "waterlang.hpp")
+
+@dataclass
+class CompileResult:
+    tokens: List[Token] = field(default_factory=list)
+    ast: List[FuncDecl] = field(default_factory=list)
+    ir: List["IRFunction"] = field(default_factory=list)
+    removed: List["IRFunction"] = field(default_factory=list)
+    pass_stats: Dict[str, "PassStats"] = field(default_factory=dict)
+    cpp: str | None = None
+    diagnostics: List[Diagnostic] = field(default_factory=list)
+    # Paths of the files that were built.
+    artifacts: List[str] = field(default_factory=list)
+
+    @property
+    def success(self) -> bool:
+        return len(self.diagnostics) == 0
+
+def compile_source(text: str, options: CompileOptions = CompileOptions()) -> CompileResult:
+    """
+    Runs the whole compiler on the source text in memory.
+    Errors don't raise, they are returned as diagnostics of the stage that produced them.
+    Nothing is shared between calls, so any number of them can run concurrently.
+    """
+    result = CompileResult()
+    lexer = Lexer(io.StringIO(text), options.file_name)
+    lexer.lex()
+    lex_result = lexer.report()
+    if not lex_result.success:
+        result.diagnostics = [Diagnostic(Stage.Lex, f"{tok.loc} {tok.value}") for tok in lex_result.tokens]
+        return result
+    result.tokens = lex_result.tokens
+
+    parser = Parser(result.tokens, options.has_main)
+    try:
+        parser.parse()
+    except (KeyboardInterrupt, SystemExit):
+        raise
+    except BaseException as e:
+        result.diagnostics.append(Diagnostic(Stage.Parse, str(e)))
+        return result
+    result.ast = parser.ast
+    if options.check_only:
+        return result
+
+    from waterlang.translator import Translator
+    exports: List[str] | None = list(options.exports)
+    if options.keep_unused or (not options.has_main and not options.exports):
+        exports = None
+    out = io.StringIO()
+    translator = Translator(result.ast, out, options.has_main, options.optimize, exports, options.extern_c)
+    try:
+        translator.translate()
+    except (KeyboardInterrupt, SystemExit):
+        raise
+    except BaseException as e:
+        result.diagnostics.append(Diagnostic(Stage.Translate, str(e)))
+        return result
+    result.ir = translator.ir
+    result.removed = translator.removed
+    result.pass_stats = translator.pass_manager.stats
+    result.cpp = out.getvalue()
+
+    if options.output is not None:
+        diagnostic = build(result.cpp, options)
+        if diagnostic is not None:
+            result.diagnostics.append(diagnostic)
+            return result
+        result.artifacts.append(options.output)
+    return result
+
+def build(cpp: str, options: CompileOptions, gpp_flags: List[str] | None = None) -> Diagnostic | None:
+    """
+    Builds the C++ source with g++ into options.output.
+    Without gpp_flags, an executable or, for modules without main, an object file with debug information is built.
+    """
+    import subprocess as sp
+    assert options.output is not None, "build() requires an output path"
+    if gpp_flags is None:
+        gpp_flags = ["-g"] if options.has_main else ["-g", "-c"]
+    # The source is piped into g++, so it never has to be written to disk.
+    gpp_args = ["g++", "-x", "c++", "-", "-I", options.include_dir, "-o", options.output] + gpp_flags
+    gpp_result = sp.run(gpp_args, input=cpp.encode("utf8"), capture_output=True)
+    if gpp_result.returncode != 0:
+        return Diagnostic(Stage.Compile, gpp_result.stderr.decode("utf8"))
+    return None
+
+def compile_file(in_file_name: str, options: CompileOptions = CompileOptions()) -> CompileResult:
+    with open(in_file_name, "r") as in_file:
+        text = in_file.read()
+    if options.file_name == CompileOptions.file_name:
+        options = replace(options, file_name=in_file_name)
+    return compile_source(text, options)
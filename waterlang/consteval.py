@@ -0,0 +1,81 @@
+from waterlang.ir import IRFunction, Instr, InstrType, Operand, INT_MIN, INT_MAX, int_binop, int_neg
+from typing import List, Dict
+
+# Instructions that neither read nor write anything outside of the function.
+PURE_INSTRS = (InstrType.Copy, InstrType.Neg, InstrType.Binary, InstrType.Ret)
+
+class ConstEvaluator:
+    """
+    Evaluates pure functions of a module at compile time.
+    Functions take no arguments, so a pure function that returns always returns the same value.
+    The results are memoized per module, so every function is evaluated at most once.
+    """
+    funcs: Dict[str, IRFunction]
+    results: Dict[str, int | None]
+
+    def __init__(self, funcs: List[IRFunction]):
+        self.funcs = {func.func_name: func for func in funcs}
+        self.results = {}
+
+    def is_pure(self, func: IRFunction) -> bool:
+        return all(instr.tag in PURE_INSTRS for instr in func.instrs)
+
+    def evaluate(self, func_name: str) -> int | None:
+        """
+        Returns the result of calling the function, or None if it can't be known at compile time.
+        Raises BaseException if the call would overflow or divide by zero.
+        """
+        if func_name in self.results:
+            return self.results[func_name]
+        func = self.funcs[func_name]
+        result = None
+        if self.is_pure(func):
+            try:
+                result = self.run(func)
+            except (ZeroDivisionError, OverflowError) as e:
+                raise BaseException(f"in function {func_name}: {e} during compile-time evaluation")
+        self.results[func_name] = result
+        return result
+
+    def run(self, func: IRFunction) -> int | None:
+        values: Dict[str, int] = {}
+
+        def value(operand: Operand) -> int:
+            res = values[operand] if isinstance(operand, str) else operand
+            if not INT_MIN <= res <= INT_MAX:
+                raise OverflowError(f"integer literal {res} does not fit into {func.return_type.to_cpp()}")
+            return res
+
+        for instr in func.instrs:
+            match instr.tag:
+                case InstrType.Ret:
+                    return value(instr.args[0])
+                case InstrType.Copy:
+                    res = value(instr.args[0])
+                case InstrType.Neg:
+                    res = int_neg(value(instr.args[0]))
+                case InstrType.Binary:
+                    assert instr.op is not None, "binary instruction without an operation"
+                    res = int_binop(instr.op, value(instr.args[0]), value(instr.args[1]))
+                case _:
+                    return None
+            assert instr.dest is not None, "value instruction without destination"
+            values[instr.dest] = res
+        # Falling off the end of the function leaves the result undefined.
+        return None
+
+def evaluate_constant_functions(funcs: List[IRFunction]) -> int:
+    """
+    Module pass that replaces the body of every function whose result is known at compile time
+    with a single return of that result and marks it constexpr.
+    """
+    evaluator = ConstEvaluator(funcs)
+    changes = 0
+    for func in funcs:
+        result = evaluator.evaluate(func.func_name)
+        if result is None:
+            continue
+        func.instrs = [Instr(InstrType.Ret, None, [result])]
+        func.constexpr = True
+        changes += 1
+    return changes
@@ -0,0 +1,344 @@
+from enum import Enum, auto
+from dataclasses import dataclass, field
+from typing import List, Dict, Callable, Tuple
+from waterlang.lang_objects import FuncDecl, StmtType, Stmt, Expr, ExprType, ValueType
+from waterlang.lexer import Op
+import time
+
+# Bounds of wl::Int (signed long on LP64).
+INT_MIN = -(1 << 63)
+INT_MAX = (1 << 63) - 1
+
+# An operand is either a constant or the name of an SSA value.
+Operand = int | str
+
+class InstrType(Enum):
+    Copy = auto()
+    Neg = auto()
+    Binary = auto()
+    Ret = auto()
+
+@dataclass
+class Instr:
+    tag: InstrType
+    dest: str | None
+    args: List[Operand]
+    op: Op | None = None
+    type: ValueType = ValueType.Int
+
+    def __str__(self):
+        args = ", ".join(str(arg) for arg in self.args)
+        match self.tag:
+            case InstrType.Ret:
+                return f"ret {args}"
+            case InstrType.Binary:
+                assert self.op is not None, "binary instruction without an operation"
+                return f"{self.dest} = {self.op.name.lower()} {args}"
+            case _:
+                return f"{self.dest} = {self.tag.name.lower()} {args}"
+
+@dataclass
+class IRFunction:
+    func_name: str
+    return_type: ValueType
+    instrs: List[Instr]
+    # Set when the result of the function is known at compile time.
+    constexpr: bool = False
+
+    def __str__(self):
+        body = "\n".join("  " + str(instr) for instr in self.instrs)
+        prefix = "constexpr " if self.constexpr else ""
+        return f"{prefix}{self.func_name} -> {self.return_type}:\n{body}"
+
+def int_binop(op: Op, lhs: int, rhs: int) -> int:
+    """
+    Evaluates a binary operation with the semantics of wl::Int.
+    Raises ZeroDivisionError and OverflowError where C++ would have undefined behaviour.
+    """
+    match op:
+        case Op.PLUS:
+            res = lhs + rhs
+        case Op.MINUS:
+            res = lhs - rhs
+        case Op.STAR:
+            res = lhs * rhs
+        case Op.SLASH:
+            if rhs == 0:
+                raise ZeroDivisionError("division by zero")
+            # C++ integer division truncates towards zero.
+            res = abs(lhs) // abs(rhs)
+            if (lhs < 0) != (rhs < 0):
+                res = -res
+        case _:
+            raise ValueError(f"not supported integer operation: {op}")
+    if not INT_MIN <= res <= INT_MAX:
+        raise OverflowError(f"integer overflow in {lhs} {op.to_cpp()} {rhs}")
+    return res
+
+def int_neg(value: int) -> int:
+    if value == INT_MIN:
+        raise OverflowError(f"integer overflow in -({value})")
+    return -value
+
+class Lowerer:
+    """
+    Lowers a FuncDecl to straight-line three-address code in SSA form.
+    Every assignment to a variable creates a new version of it, so the only
+    place where a Waterlang variable keeps its identity is the name of the value.
+    """
+    decl: FuncDecl
+    instrs: List[Instr]
+    scopes: List[Dict[str, Operand | None]]
+    versions: Dict[str, int]
+    temps: int
+    returned: bool
+
+    def __init__(self, decl: FuncDecl):
+        self.decl = decl
+        self.instrs = []
+        self.scopes = []
+        self.versions = {}
+        self.temps = 0
+        self.returned = False
+
+    def lower(self) -> IRFunction:
+        self.stmt(self.decl.stmt)
+        return IRFunction(self.decl.func_name, self.decl.return_type, self.instrs)
+
+    def temp(self) -> str:
+        name = f"t{self.temps}"
+        self.temps += 1
+        return name
+
+    def version(self, ident: str) -> str:
+        n = self.versions.get(ident, 0)
+        self.versions[ident] = n + 1
+        return f"{ident}_{n}"
+
+    def lookup(self, ident: str) -> Dict[str, Operand | None]:
+        for scope in reversed(self.scopes):
+            if ident in scope:
+                return scope
+        raise ValueError(f"logic error: unknown variable {ident} survived parsing")
+
+    def stmt(self, stmt: Stmt) -> None:
+        # Everything after a return statement is unreachable.
+        if self.returned:
+            return
+        match stmt.tag:
+            case StmtType.BlockStmt:
+                self.scopes.append({})
+                for s in stmt.stmts:
+                    self.stmt(s)
+                self.scopes.pop()
+            case StmtType.ReturnStmt:
+                self.instrs.append(Instr(InstrType.Ret, None, [self.expr(stmt.expr)]))
+                self.returned = True
+            case StmtType.VarDeclStmt:
+                if not self.scopes:
+                    self.scopes.append({})
+                value: Operand | None = None
+                if stmt.initializer is not None:
+                    value = self.assign(stmt.var.ident, stmt.initializer, stmt.var.type)
+                self.scopes[-1][stmt.var.ident] = value
+            case StmtType.ReasgnStmt:
+                scope = self.lookup(stmt.var.ident)
+                scope[stmt.var.ident] = self.assign(stmt.var.ident, stmt.expr, stmt.var.type)
+            case _:
+                raise NotImplementedError(f"lowering statements of type {stmt.tag} is not supported")
+
+    def assign(self, ident: str, expr: Expr, vtype: ValueType) -> str:
+        dest = self.version(ident)
+        self.instrs.append(Instr(InstrType.Copy, dest, [self.expr(expr)], type=vtype))
+        return dest
+
+    def expr(self, expr: Expr) -> Operand:
+        match expr.tag:
+            case ExprType.Literal:
+                return expr.value
+            case ExprType.Variable:
+                value = self.lookup(expr.var.ident)[expr.var.ident]
+                # The parser can't tell a shadowed variable from the one that shadows it.
+                if value is None:
+                    raise BaseException(f"{expr.loc} use of uninitialized variable {expr.var.ident}")
+                return value
+            case ExprType.Grouping:
+                return self.expr(expr.expr)
+            case ExprType.Unary:
+                # -9223372036854775808 is INT_MIN, even though the literal on its own doesn't fit into wl::Int.
+                if expr.negated and expr.expr.tag is ExprType.Literal:
+                    return -expr.expr.value
+                value = self.expr(expr.expr)
+                if not expr.negated:
+                    return value
+                dest = self.temp()
+                self.instrs.append(Instr(InstrType.Neg, dest, [value]))
+                return dest
+            case ExprType.Binary:
+                left = self.expr(expr.left)
+                right = self.expr(expr.right)
+                dest = self.temp()
+                self.instrs.append(Instr(InstrType.Binary, dest, [left, right], expr.op.value))
+                return dest
+            case _:
+                raise NotImplementedError(f"lowering expressions of type {expr.tag} is not supported")
+
+def lower(ast: List[FuncDecl]) -> List[IRFunction]:
+    return [Lowerer(decl).lower() for decl in ast]
+
+def call_graph(funcs: List[IRFunction]) -> Dict[str, set[str]]:
+    """
+    Maps every function to the names of the functions it calls.
+    Waterlang has no call expressions yet, so no function references another one.
+    """
+    return {func.func_name: set() for func in funcs}
+
+def tree_shake(funcs: List[IRFunction], roots: List[str]) -> List[IRFunction]:
+    """
+    Returns the functions that are not reachable from any of the roots.
+    """
+    graph = call_graph(funcs)
+    unknown = [root for root in roots if root not in graph]
+    if unknown:
+        raise BaseException(f"exported function {unknown[0]} is not defined")
+    reachable: set[str] = set()
+    worklist = list(roots)
+    while worklist:
+        name = worklist.pop()
+        if name in reachable:
+            continue
+        reachable.add(name)
+        worklist.extend(graph[name])
+    return [func for func in funcs if func.func_name not in reachable]
+
+# Passes take a function and return how many changes they have made to it.
+Pass = Callable[[IRFunction], int]
+# Module passes do the same for the whole module at once.
+ModulePass = Callable[[List[IRFunction]], int]
+
+def copy_propagation(func: IRFunction) -> int:
+    replacements: Dict[str, Operand] = {}
+    changes = 0
+    for instr in func.instrs:
+        for i, arg in enumerate(instr.args):
+            if isinstance(arg, str) and arg in replacements:
+                instr.args[i] = replacements[arg]
+                changes += 1
+        if instr.tag is InstrType.Copy and isinstance(instr.args[0], str):
+            assert instr.dest is not None, "copy without destination"
+            replacements[instr.dest] = instr.args[0]
+    return changes
+
+def constant_propagation(func: IRFunction) -> int:
+    """
+    Folds instructions with constant operands and propagates constants into their uses,
+    including through variable declarations and reassignments.
+    Operations that would overflow or divide by zero are left for run time.
+    """
+    constants: Dict[str, int] = {}
+    changes = 0
+    for instr in func.instrs:
+        for i, arg in enumerate(instr.args):
+            if isinstance(arg, str) and arg in constants:
+                instr.args[i] = constants[arg]
+                changes += 1
+        if instr.dest is None or not all(isinstance(arg, int) for arg in instr.args):
+            continue
+        if any(not INT_MIN <= arg <= INT_MAX for arg in instr.args):
+            continue
+        try:
+            match instr.tag:
+                case InstrType.Copy:
+                    value = instr.args[0]
+                case InstrType.Neg:
+                    value = int_neg(instr.args[0])
+                    changes += 1
+                case InstrType.Binary:
+                    assert instr.op is not None, "binary instruction without an operation"
+                    value = int_binop(instr.op, instr.args[0], instr.args[1])
+                    changes += 1
+                case _:
+                    continue
+        except (ZeroDivisionError, OverflowError):
+            continue
+        assert isinstance(value, int)
+        instr.tag = InstrType.Copy
+        instr.args = [value]
+        instr.op = None
+        constants[instr.dest] = value
+    return changes
+
+def common_subexpression_elimination(func: IRFunction) -> int:
+    available: Dict[Tuple, str] = {}
+    changes = 0
+    for instr in func.instrs:
+        if instr.dest is None or instr.tag not in (InstrType.Neg, InstrType.Binary):
+            continue
+        args = instr.args
+        if instr.op in (Op.PLUS, Op.STAR):
+            args = sorted(args, key=lambda arg: (isinstance(arg, str), str(arg)))
+        key = (instr.tag, instr.op, *args)
+        if key in available:
+            instr.tag = InstrType.Copy
+            instr.args = [available[key]]
+            instr.op = None
+            changes += 1
+        else:
+            available[key] = instr.dest
+    return changes
+
+def dead_store_elimination(func: IRFunction) -> int:
+    live: set[str] = set()
+    kept: List[Instr] = []
+    for instr in reversed(func.instrs):
+        if instr.dest is not None and instr.dest not in live:
+            continue
+        live.update(arg for arg in instr.args if isinstance(arg, str))
+        kept.append(instr)
+    changes = len(func.instrs) - len(kept)
+    kept.reverse()
+    func.instrs = kept
+    return changes
+
+DEFAULT_PASSES: List[Pass] = [
+    copy_propagation,
+    constant_propagation,
+    common_subexpression_elimination,
+    dead_store_elimination,
+]
+
+@dataclass
+class PassStats:
+    name: str
+    runs: int = 0
+    changes: int = 0
+    seconds: float = 0.0
+
+    def __str__(self):
+        return f"{self.name}: {self.changes} changes in {self.runs} runs, {self.seconds * 1000:.3f} ms"
+
+@dataclass
+class PassManager:
+    passes: List[Pass] = field(default_factory=lambda: list(DEFAULT_PASSES))
+    # Run once after the function passes have finished.
+    module_passes: List[ModulePass] = field(default_factory=list)
+    # The pipeline is repeated until nothing changes, but never more than this many times.
+    max_iterations: int = 8
+    stats: Dict[str, PassStats] = field(default_factory=dict)
+
+    def run_pass(self, p: Pass | ModulePass, target: IRFunction | List[IRFunction]) -> int:
+        stats = self.stats.setdefault(p.__name__, PassStats(p.__name__))
+        start = time.perf_counter()
+        changes = p(target) # type: ignore[arg-type]
+        stats.seconds += time.perf_counter() - start
+        stats.runs += 1
+        stats.changes += changes
+        return changes
+
+    def run(self, funcs: List[IRFunction]) -> None:
+        for func in funcs:
+            for _ in range(self.max_iterations):
+                if sum(self.run_pass(p, func) for p in self.passes) == 0:
+                    break
+        for mp in self.module_passes:
+            self.run_pass(mp, funcs)
@@ -1,7 +1,8 @@
 from enum import Enum, auto
 from dataclasses import dataclass
-from typing import List, Any, Union
-from waterlang.lexer import Token
+from typing import List, Any, Union, TYPE_CHECKING
+if TYPE_CHECKING:
+    from waterlang.lexer import Token, Location
 
 class ValueType(Enum):
     Int = auto()
@@ -30,7 +31,7 @@ class Expr:
         match self.tag:
             case ExprType.Binary:
                 self.left: Expr = information["left"]
-                self.op: Token = information["op"]
+                self.op: "Token" = information["op"]
                 self.right: Expr = information["right"]
             case ExprType.Unary:
                 self.negated: bool = information["negated"]
@@ -40,6 +41,7 @@ class Expr:
                 self.type: ValueType = information["type"]
             case ExprType.Variable:
                 self.var = information["var"]
+                self.loc: "Location" = information["loc"]
             case ExprType.Grouping:
                 self.expr = information["expr"]
             case _:
@@ -101,11 +103,11 @@ class Stmt:
 
 class FuncDecl:
     func_name: str
-    arg_list: List[Token]
+    arg_list: List["Token"]
     return_type: ValueType 
     stmt: Stmt
 
-    def __init__(self, func_name: str, arg_list: List[Token], return_type: ValueType, stmt: Stmt):
+    def __init__(self, func_name: str, arg_list: List["Token"], return_type: ValueType, stmt: Stmt):
         self.func_name = func_name
         assert arg_list == [], "function arguments not supported yet"
         self.arg_list = arg_list
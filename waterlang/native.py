@@ -0,0 +1,104 @@
+from waterlang.translator import C_SYMBOL_PREFIX
+from waterlang.api import ROOT_DIR, CompileError, CompileOptions, build, compile_source
+from typing import Callable, Dict
+import ctypes
+import hashlib
+import os
+import tempfile
+import threading
+
+CACHE_DIR = os.environ.get("WATERLANG_CACHE", os.path.join(os.path.expanduser("~"), ".cache", "waterlang"))
+GPP_FLAGS = ["-O2", "-shared", "-fPIC"]
+
+# Maps the C++ return types produced by ValueType.to_cpp() to ctypes.
+CTYPES: Dict[str, type] = {
+    "wl::Int": ctypes.c_long,
+}
+
+class NativeModule:
+    """
+    A compiled Waterlang module loaded into the current process.
+    Every function of the module is available as an attribute; main is available as main.
+    """
+    path: str
+    lib: ctypes.CDLL
+    funcs: Dict[str, Callable[[], int]]
+
+    def __init__(self, path: str, lib: ctypes.CDLL, signatures: Dict[str, str]):
+        self.path = path
+        self.lib = lib
+        self.funcs = {}
+        for func_name, cpp_type in signatures.items():
+            func = getattr(lib, C_SYMBOL_PREFIX + func_name)
+            func.argtypes = []
+            func.restype = CTYPES[cpp_type]
+            self.funcs[func_name] = func
+
+    def __getattr__(self, name: str) -> Callable[[], int]:
+        try:
+            return self.__dict__["funcs"][name]
+        except KeyError:
+            raise AttributeError(f"module {self.path} has no function {name}")
+
+# Loaded modules by cache directory, include directory and hash of the source.
+# A library can't be unloaded by ctypes, so entries are never evicted.
+_loaded: Dict[tuple[str, str, str], NativeModule] = {}
+_loaded_lock = threading.Lock()
+
+def content_hash(cpp_source: str, include_dir: str = ROOT_DIR) -> str:
+    """
+    Hashes everything the library is built from, so that a change to the translator never reuses a stale build.
+    """
+    digest = hashlib.sha256()
+    digest.update(cpp_source.encode("utf8"))
+    with open(CompileOptions(include_dir=include_dir).header, "rb") as header:
+        digest.update(header.read())
+    digest.update(" ".join(GPP_FLAGS).encode("utf8"))
+    return digest.hexdigest()
+
+def translate(source: str, file_name: str) -> tuple[str, Dict[str, str]]:
+    """
+    Translates a module to C++ with C linkage.
+    Returns the C++ source and the C++ return type of every function, or raises CompileError.
+    """
+    result = compile_source(source, CompileOptions(file_name=file_name, has_main=False, extern_c=True))
+    if not result.success:
+        raise CompileError(result.diagnostics)
+    assert result.cpp is not None, "successful translation always produces C++ source"
+    signatures = {func.func_name: func.return_type.to_cpp() for func in result.ir}
+    return result.cpp, signatures
+
+def compile_library(cpp_source: str, out_path: str, include_dir: str = ROOT_DIR) -> None:
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(out_path)) as tmp_dir:
+        so_path = os.path.join(tmp_dir, "module.so")
+        diagnostic = build(cpp_source, CompileOptions(output=so_path, include_dir=include_dir), GPP_FLAGS)
+        if diagnostic is not None:
+            raise CompileError([diagnostic])
+        # Renaming is atomic, so concurrent builds of the same module never see a partial library.
+        os.replace(so_path, out_path)
+
+def load(source: str, file_name: str = "<string>", cache_dir: str = CACHE_DIR, include_dir: str = ROOT_DIR) -> NativeModule:
+    """
+    Compiles a Waterlang module to a shared library and loads it into the current process.
+    Loaded modules are cached by the hash of the source and libraries on disk by the hash of the C++,
+    so loading the same source again costs no compilation and no dlopen.
+    Every cache directory gets its own modules, so a library is always loaded from the directory it was asked for.
+    """
+    source_key = (os.path.abspath(cache_dir), os.path.abspath(include_dir), hashlib.sha256(source.encode("utf8")).hexdigest())
+    with _loaded_lock:
+        module = _loaded.get(source_key)
+    if module is not None:
+        return module
+    # Translation and compilation happen outside of the lock, so they don't hold up loads of other modules.
+    cpp_source, signatures = translate(source, file_name)
+    so_path = os.path.join(cache_dir, content_hash(cpp_source, include_dir) + ".so")
+    if not os.path.exists(so_path):
+        compile_library(cpp_source, so_path, include_dir)
+    module = NativeModule(so_path, ctypes.CDLL(so_path), signatures)
+    with _loaded_lock:
+        return _loaded.setdefault(source_key, module)
+
+def load_file(in_file_name: str, cache_dir: str = CACHE_DIR, include_dir: str = ROOT_DIR) -> NativeModule:
+    with open(in_file_name, "r") as in_file:
+        return load(in_file.read(), in_file_name, cache_dir, include_dir)
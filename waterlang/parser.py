@@ -277,6 +277,7 @@ class Parser:
                     raise BaseException(f"{tok.loc} use of uninitialized variable")
                 tag = ExprType.Variable
                 information["var"] = var
+                information["loc"] = tok.loc
             case TType.L_PAREN:
                 tag = ExprType.Grouping
                 information["expr"] = self.expr()
@@ -0,0 +1,107 @@
+from waterlang.api import ROOT_DIR, CompileOptions, build
+from waterlang.native import CACHE_DIR
+from dataclasses import dataclass
+from typing import List
+import hashlib
+import os
+import shutil
+import statistics
+import subprocess as sp
+import time
+
+GPP_FLAGS = ["-O2"]
+
+@dataclass
+class PgoReport:
+    profile_dir: str
+    # True if the profile of an earlier build of the same source was used.
+    reused_profile: bool
+    baseline_seconds: float
+    pgo_seconds: float
+
+    @property
+    def speedup(self) -> float:
+        return self.baseline_seconds / self.pgo_seconds if self.pgo_seconds > 0 else float("inf")
+
+    def __str__(self):
+        reused = " (reused profile)" if self.reused_profile else ""
+        return (f"PGO{reused}: training workload took {self.baseline_seconds * 1000:.3f} ms without profile, "
+                f"{self.pgo_seconds * 1000:.3f} ms with profile, speedup {self.speedup:.2f}x")
+
+class PgoBuilder:
+    """
+    Builds an executable with profile-guided optimization.
+    The C++ source is stored in a directory named after its hash and the training inputs, together with
+    the profile collected for it, so the training step is skipped as long as neither of them changes.
+    """
+    cpp: str
+    output: str
+    training_inputs: List[str]
+    runs: int
+    include_dir: str
+    work_dir: str
+
+    def __init__(self, cpp: str, output: str, training_inputs: List[str], runs: int = 5, cache_dir: str = CACHE_DIR, include_dir: str = ROOT_DIR):
+        self.cpp = cpp
+        self.output = output
+        self.training_inputs = training_inputs
+        self.runs = runs
+        self.include_dir = include_dir
+        digest = hashlib.sha256(cpp.encode("utf8"))
+        with open(CompileOptions(include_dir=include_dir).header, "rb") as header:
+            digest.update(header.read())
+        digest.update(" ".join(GPP_FLAGS).encode("utf8"))
+        # A profile collected on other inputs would describe another workload.
+        for training_input in training_inputs:
+            digest.update(training_input.encode("utf8"))
+            with open(training_input, "rb") as training_file:
+                digest.update(hashlib.sha256(training_file.read()).digest())
+        self.work_dir = os.path.join(cache_dir, "pgo", digest.hexdigest())
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.work_dir, name)
+
+    def compile(self, binary: str, profile_flags: List[str]) -> None:
+        # The profile is named after the object file, so every build must use the same one.
+        options = CompileOptions(output=self.path("module.o"), include_dir=self.include_dir)
+        diagnostic = build(self.cpp, options, GPP_FLAGS + ["-c"] + profile_flags)
+        if diagnostic is not None:
+            raise BaseException(f"while compiling C++ source:\n{diagnostic.message}")
+        link_result = sp.run(["g++", self.path("module.o"), "-o", binary] + GPP_FLAGS + profile_flags, capture_output=True)
+        if link_result.returncode != 0:
+            raise BaseException(f"while linking {binary}:\n{link_result.stderr.decode("utf8")}")
+
+    def run_workload(self, binary: str) -> float:
+        """
+        Runs the binary on every training input and returns the median time of a whole pass over them.
+        """
+        samples = []
+        for _ in range(self.runs):
+            start = time.perf_counter()
+            for training_input in self.training_inputs or [None]:
+                stdin = open(training_input, "rb") if training_input is not None else sp.DEVNULL
+                try:
+                    res = sp.run([binary], stdin=stdin, stdout=sp.DEVNULL, stderr=sp.DEVNULL)
+                finally:
+                    if training_input is not None:
+                        stdin.close()
+                # The exit code is the result of main, only signals are errors.
+                if res.returncode < 0:
+                    raise BaseException(f"{binary} was killed by signal {-res.returncode} during training")
+            samples.append(time.perf_counter() - start)
+        return statistics.median(samples)
+
+    def build(self) -> PgoReport:
+        os.makedirs(self.work_dir, exist_ok=True)
+        with open(self.path("module.cpp"), "w") as cpp_file:
+            cpp_file.write(self.cpp)
+        reused = os.path.exists(self.path("module.gcda"))
+        if not reused:
+            self.compile(self.path("instrumented"), ["-fprofile-generate"])
+            self.run_workload(self.path("instrumented"))
+        self.compile(self.path("baseline"), [])
+        baseline_seconds = self.run_workload(self.path("baseline"))
+        self.compile(self.path("optimized"), ["-fprofile-use", "-fprofile-correction"])
+        pgo_seconds = self.run_workload(self.path("optimized"))
+        shutil.copy2(self.path("optimized"), self.output)
+        return PgoReport(self.work_dir, reused, baseline_seconds, pgo_seconds)
@@ -0,0 +1,213 @@
+from waterlang.lang_objects import FuncDecl, StmtType, Stmt, Expr, ExprType
+from waterlang.lexer import Op
+from waterlang.api import CompileError, CompileOptions, Diagnostic, Stage, compile_source
+from types import CodeType
+from typing import Any, Callable, Dict, List, TextIO
+import hashlib
+import io
+import threading
+
+MASK = (1 << 64) - 1
+SIGN = 1 << 63
+
+# Runtime of the Python backend. Every operation behaves like the same operation on wl::Int,
+# with two's complement wraparound on overflow.
+def wl_rt_wrap(value: int) -> int:
+    return ((value + SIGN) & MASK) - SIGN
+
+def wl_rt_add(lhs: int, rhs: int) -> int:
+    return ((lhs + rhs + SIGN) & MASK) - SIGN
+
+def wl_rt_sub(lhs: int, rhs: int) -> int:
+    return ((lhs - rhs + SIGN) & MASK) - SIGN
+
+def wl_rt_mul(lhs: int, rhs: int) -> int:
+    return ((lhs * rhs + SIGN) & MASK) - SIGN
+
+def wl_rt_div(lhs: int, rhs: int) -> int:
+    if rhs == 0:
+        raise ZeroDivisionError("division by zero")
+    # x86 traps on this one instead of wrapping around.
+    if lhs == -SIGN and rhs == -1:
+        raise OverflowError(f"integer overflow in {lhs} / {rhs}")
+    # C++ integer division truncates towards zero.
+    res = abs(lhs) // abs(rhs)
+    return -res if (lhs < 0) != (rhs < 0) else res
+
+def wl_rt_neg(value: int) -> int:
+    return ((-value + SIGN) & MASK) - SIGN
+
+RUNTIME: Dict[str, Any] = {
+    "wl_rt_wrap": wl_rt_wrap,
+    "wl_rt_add": wl_rt_add,
+    "wl_rt_sub": wl_rt_sub,
+    "wl_rt_mul": wl_rt_mul,
+    "wl_rt_div": wl_rt_div,
+    "wl_rt_neg": wl_rt_neg,
+}
+
+RUNTIME_OPS = {
+    Op.PLUS: "wl_rt_add",
+    Op.MINUS: "wl_rt_sub",
+    Op.STAR: "wl_rt_mul",
+    Op.SLASH: "wl_rt_div",
+}
+
+class PyTranslator:
+    """
+    Translates the AST to Python source.
+    Python has no block scope, so every declaration gets a name of its own.
+    """
+    ast: List[FuncDecl]
+    out_file: TextIO
+    nesting: int
+    scopes: List[Dict[str, str]]
+    versions: Dict[str, int]
+    # Names that have been assigned a value. Functions have no branches, so this is exact.
+    assigned: set[str]
+
+    def __init__(self, ast: List[FuncDecl], out_file: TextIO):
+        self.ast = ast
+        self.out_file = out_file
+        self.nesting = 0
+        self.scopes = []
+        self.versions = {}
+        self.assigned = set()
+
+    def write(self, content: str) -> None:
+        self.out_file.write(content)
+
+    def indent(self) -> None:
+        self.out_file.write(" "*self.nesting*4)
+
+    @staticmethod
+    def func_name(func_name: str) -> str:
+        return "wl_f_" + func_name
+
+    def translate(self) -> None:
+        for decl in self.ast:
+            self.func_decl(decl)
+
+    def func_decl(self, decl: FuncDecl) -> None:
+        self.scopes = [{}]
+        self.versions = {}
+        self.assigned = set()
+        self.write(f"def {self.func_name(decl.func_name)}():\n")
+        self.nesting += 1
+        self.indent()
+        self.write("pass\n")
+        self.stmt(decl.stmt)
+        self.nesting -= 1
+        self.write("\n")
+
+    def lookup(self, ident: str) -> str:
+        for scope in reversed(self.scopes):
+            if ident in scope:
+                return scope[ident]
+        raise ValueError(f"logic error: unknown variable {ident} survived parsing")
+
+    def stmt(self, stmt: Stmt) -> None:
+        match stmt.tag:
+            case StmtType.BlockStmt:
+                self.scopes.append({})
+                for s in stmt.stmts:
+                    self.stmt(s)
+                self.scopes.pop()
+            case StmtType.ReturnStmt:
+                self.indent()
+                self.write(f"return {self.expr(stmt.expr)}\n")
+            case StmtType.VarDeclStmt:
+                n = self.versions.get(stmt.var.ident, 0)
+                self.versions[stmt.var.ident] = n + 1
+                name = f"{stmt.var.ident}_{n}"
+                self.scopes[-1][stmt.var.ident] = name
+                if stmt.initializer is not None:
+                    self.indent()
+                    self.write(f"{name} = {self.expr(stmt.initializer)}\n")
+                    self.assigned.add(name)
+            case StmtType.ReasgnStmt:
+                name = self.lookup(stmt.var.ident)
+                self.indent()
+                self.write(f"{name} = {self.expr(stmt.expr)}\n")
+                self.assigned.add(name)
+            case _:
+                raise NotImplementedError(f"translating statements of type {stmt.tag} to Python is not supported")
+
+    def expr(self, expr: Expr) -> str:
+        match expr.tag:
+            case ExprType.Literal:
+                return str(wl_rt_wrap(expr.value))
+            case ExprType.Variable:
+                name = self.lookup(expr.var.ident)
+                # The parser can't tell a shadowed variable from the one that shadows it.
+                if name not in self.assigned:
+                    raise BaseException(f"{expr.loc} use of uninitialized variable {expr.var.ident}")
+                return name
+            case ExprType.Grouping:
+                return self.expr(expr.expr)
+            case ExprType.Unary:
+                if expr.negated:
+                    return f"wl_rt_neg({self.expr(expr.expr)})"
+                return self.expr(expr.expr)
+            case ExprType.Binary:
+                return f"{RUNTIME_OPS[expr.op.value]}({self.expr(expr.left)}, {self.expr(expr.right)})"
+            case _:
+                raise NotImplementedError(f"translating expressions of type {expr.tag} to Python is not supported")
+
+class PyModule:
+    """
+    A Waterlang module compiled to Python code. Every function is available as an attribute.
+    """
+    funcs: Dict[str, Callable[[], int]]
+
+    def __init__(self, code: CodeType, func_names: List[str]):
+        namespace = dict(RUNTIME)
+        exec(code, namespace)
+        self.funcs = {func_name: namespace[PyTranslator.func_name(func_name)] for func_name in func_names}
+
+    def __getattr__(self, name: str) -> Callable[[], int]:
+        try:
+            return self.__dict__["funcs"][name]
+        except KeyError:
+            raise AttributeError(f"module has no function {name}")
+
+# Compiled code objects and the names of their functions by hash of the source.
+_code_cache: Dict[str, tuple[CodeType, List[str]]] = {}
+_code_cache_lock = threading.Lock()
+
+def compile_ast(ast: List[FuncDecl], file_name: str = "<string>") -> tuple[CodeType, List[str]]:
+    """
+    Compiles the AST of a module to a Python code object.
+    Returns the code object and the names of the functions defined by it, or raises CompileError.
+    """
+    out = io.StringIO()
+    try:
+        PyTranslator(ast, out).translate()
+    except (KeyboardInterrupt, SystemExit):
+        raise
+    except BaseException as e:
+        raise CompileError([Diagnostic(Stage.Translate, str(e))])
+    return compile(out.getvalue(), file_name, "exec"), [decl.func_name for decl in ast]
+
+def parse(source: str, file_name: str = "<string>", has_main: bool = False) -> List[FuncDecl]:
+    result = compile_source(source, CompileOptions(file_name=file_name, has_main=has_main, check_only=True))
+    if not result.success:
+        raise CompileError(result.diagnostics)
+    return result.ast
+
+def load(source: str, file_name: str = "<string>") -> PyModule:
+    """
+    Compiles a Waterlang module to Python code objects, which are cached by the hash of the source.
+    """
+    key = hashlib.sha256(source.encode("utf8")).hexdigest()
+    with _code_cache_lock:
+        cached = _code_cache.get(key)
+    if cached is None:
+        cached = compile_ast(parse(source, file_name), file_name)
+        with _code_cache_lock:
+            _code_cache[key] = cached
+    return PyModule(*cached)
+
+def load_file(in_file_name: str) -> PyModule:
+    with open(in_file_name, "r") as in_file:
+        return load(in_file.read(), in_file_name)
@@ -1,19 +1,35 @@
-from waterlang.lang_objects import FuncDecl, StmtType, Stmt, Expr, ExprType, ValueType
-from waterlang.lexer import Token, Op, TType
+from waterlang.lang_objects import FuncDecl
+from waterlang.ir import IRFunction, Instr, InstrType, Operand, PassManager, INT_MIN, lower, tree_shake
+from waterlang.consteval import evaluate_constant_functions
 from typing import List, TextIO
 
+C_SYMBOL_PREFIX = "wl_"
+
 class Translator:
     ast: List[FuncDecl]
     out_file: TextIO
-    current_subtree: FuncDecl | Stmt | Expr
     nesting: int
     has_main: bool
+    optimize: bool
+    pass_manager: PassManager
+    ir: List[IRFunction]
+    # Functions that are emitted even if main doesn't reach them. None keeps every function.
+    exports: List[str] | None
+    removed: List[IRFunction]
+    # Give every function C linkage so that it can be looked up in a shared library.
+    extern_c: bool
 
-    def __init__(self, ast: List[FuncDecl], out_file: TextIO, has_main: bool = True):
+    def __init__(self, ast: List[FuncDecl], out_file: TextIO, has_main: bool = True, optimize: bool = True, exports: List[str] | None = None, extern_c: bool = False):
         self.ast = ast
         self.out_file = out_file
         self.nesting = 0
         self.has_main = has_main
+        self.optimize = optimize
+        self.pass_manager = PassManager(module_passes=[evaluate_constant_functions])
+        self.ir = []
+        self.exports = exports
+        self.removed = []
+        self.extern_c = extern_c
 
     def write(self, content: str) -> None:
         self.out_file.write(content)
@@ -22,112 +38,83 @@ class Translator:
         self.out_file.write(" "*self.nesting*2)
 
     def translate(self) -> None:
+        self.ir = lower(self.ast)
+        if self.exports is not None:
+            roots = self.exports + ["main"] if self.has_main else self.exports
+            self.removed = tree_shake(self.ir, roots)
+            removed_names = {func.func_name for func in self.removed}
+            self.ir = [func for func in self.ir if func.func_name not in removed_names]
+        if self.optimize:
+            self.pass_manager.run(self.ir)
         self.write("#include \"lib/waterlang.hpp\"\n")
-        for decl in self.ast:
-            self.current_subtree = decl
-            self.func_decl()
+        for func in self.ir:
+            self.func_decl(func)
         if self.has_main:
             self.write("""
-int main() 
+int main()
 {
   return (int)WL_Main();
 }
 """)
 
-    def func_decl(self) -> None:
-        assert isinstance(self.current_subtree, FuncDecl), "expected FuncDecl in func_decl()"
-        self.write(self.current_subtree.return_type.to_cpp() + " ")
-        if self.current_subtree.func_name == "main":
-            self.write("WL_Main" + "(")
-        else:
-            self.write(self.current_subtree.func_name + "(")
-        for arg in self.current_subtree.arg_list:
-            # No arguments support yet...
-            raise NotImplementedError("argument compilation is not supported")
-        self.write(")\n")
-        if self.current_subtree.stmt.tag is StmtType.BlockStmt:
-            self.current_subtree = self.current_subtree.stmt
-            self.stmt()
-        else:
-            self.write("{\n")
-            self.nesting += 1
-            self.current_subtree = self.current_subtree.stmt
+    def func_name(self, func_name: str) -> str:
+        # C symbols share one namespace with libc, so they get a prefix of their own.
+        if self.extern_c:
+            return C_SYMBOL_PREFIX + func_name
+        if func_name == "main":
+            return "WL_Main"
+        return func_name
+
+    def is_exported(self, func: IRFunction) -> bool:
+        """
+        Whether the function must end up in the symbol table of the object file.
+        constexpr functions are implicitly inline, so these are never emitted as constexpr.
+        """
+        if self.extern_c or not self.has_main:
+            return True
+        return self.exports is not None and func.func_name in self.exports
+
+    def func_decl(self, func: IRFunction) -> None:
+        if self.extern_c:
+            self.write("extern \"C\" ")
+        elif func.constexpr and not self.is_exported(func):
+            self.write("constexpr ")
+        self.write(func.return_type.to_cpp() + " ")
+        self.write(self.func_name(func.func_name) + "()\n")
+        self.write("{\n")
+        self.nesting += 1
+        for instr in func.instrs:
             self.indent()
-            self.stmt()
+            self.instr(instr)
             self.write("\n")
-            self.nesting -= 1
-            self.indent()
-            self.write("}")
-        self.write("\n\n")
+        self.nesting -= 1
+        self.write("}\n\n")
 
-    def stmt(self) -> None:
-        assert isinstance(self.current_subtree, Stmt), "expected Stmt in stmt()"
-        match self.current_subtree.tag:
-            case StmtType.ReturnStmt:
-                self.write("return ")
-                self.current_subtree = self.current_subtree.expr
-                self.expr()
-                self.write(";")
-            case StmtType.BlockStmt:
-                self.write("{\n")
-                self.nesting += 1
-                len_block = len(self.current_subtree.stmts)
-                for i, stmt in enumerate(self.current_subtree.stmts):
-                    self.current_subtree = stmt
-                    self.indent()
-                    self.stmt()
-                    if i != len_block - 1:
-                        self.write("\n")
-                self.write("\n")
-                self.nesting -= 1
-                self.indent()
-                self.write("}")
-            case StmtType.VarDeclStmt:
-                var = self.current_subtree.var
-                if var.const:
-                    self.write("const ")
-                self.write(var.type.to_cpp() + " ")
-                self.write(var.ident)
-                if self.current_subtree.initializer is not None:
-                    self.write(" = ")
-                    self.current_subtree = self.current_subtree.initializer
-                    self.expr()
-                self.write(";")
-            case StmtType.ReasgnStmt:
-                var = self.current_subtree.var
-                self.write(var.ident + " = ")
-                self.current_subtree = self.current_subtree.expr
-                self.expr()
-                self.write(";")
-            case _:
-                raise NotImplementedError(f"compiling statements of type {self.current_subtree.tag} is not supported")
-    
-    def expr(self) -> None:
-        assert isinstance(self.current_subtree, Expr), "expected Expr in expr()"
-        match self.current_subtree.tag:
-            case ExprType.Literal:
-                self.write(str(self.current_subtree.value))
-            case ExprType.Variable:
-                self.write(str(self.current_subtree.var.ident))
-            case ExprType.Grouping:
-                self.write("(")
-                self.current_subtree = self.current_subtree.expr
-                self.expr()
-                self.write(")")
-            case ExprType.Unary:
-                if self.current_subtree.negated:
-                    self.write("-")
-                self.current_subtree = self.current_subtree.expr
-                self.expr()
-            case ExprType.Binary:
-                left = self.current_subtree.left
-                right = self.current_subtree.right
-                op = self.current_subtree.op
-                self.current_subtree = left
-                self.expr()
-                assert op.ttype == TType.OP, "expected operation in expr(), case ExprType.Binary"
-                self.write(op.value.to_cpp())
-                self.current_subtree = right
-                self.expr()
+    def instr(self, instr: Instr) -> None:
+        if instr.tag is InstrType.Ret:
+            self.write("return " + self.operand(instr.args[0]) + ";")
+            return
+        # Every value is assigned exactly once, so all of them can be const.
+        self.write(f"const {instr.type.to_cpp()} {instr.dest} = ")
+        match instr.tag:
+            case InstrType.Copy:
+                self.write(self.operand(instr.args[0]))
+            case InstrType.Neg:
+                self.write(f"-({self.operand(instr.args[0])})")
+            case InstrType.Binary:
+                assert instr.op is not None, "expected operation in instr(), case InstrType.Binary"
+                lhs, rhs = (self.operand(arg) for arg in instr.args)
+                self.write(f"{lhs} {instr.op.to_cpp()} {rhs}")
             case _:
-                raise NotImplementedError(f"compiling expressions of type {self.current_subtree.tag} is not supported")
\ No newline at end of file
+                raise NotImplementedError(f"compiling instructions of type {instr.tag} is not supported")
+        self.write(";")
+
+    def operand(self, operand: Operand) -> str:
+        if isinstance(operand, str):
+            return operand
+        # The literal 9223372036854775808 does not fit into a signed long, so it can't be negated.
+        if operand == INT_MIN:
+            return f"({INT_MIN + 1} - 1)"
+        if operand < 0:
+            return f"({operand})"
+        return str(operand)
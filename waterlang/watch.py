@@ -0,0 +1,117 @@
+from waterlang.api import CompileOptions, CompileResult, build, compile_source
+from dataclasses import replace
+from typing import Dict
+import os
+import time
+
+class Watcher:
+    """
+    Rebuilds a module every time its source or the runtime header changes.
+    Files are polled, and a rebuild starts only once they have stopped changing for a moment,
+    so that a burst of saves results in a single rebuild.
+    Only the stages affected by the change are rerun: a change to the header only rebuilds the C++.
+    """
+    in_file_name: str
+    options: CompileOptions
+    cpp_path: str | None
+    header: str
+    interval: float
+    debounce: float
+    stamps: Dict[str, tuple[int, int] | None]
+    source: str | None
+    result: CompileResult | None
+
+    def __init__(self, in_file_name: str, options: CompileOptions, cpp_path: str | None = None, interval: float = 0.1, debounce: float = 0.2):
+        self.in_file_name = in_file_name
+        self.options = replace(options, file_name=in_file_name)
+        self.cpp_path = cpp_path
+        self.header = options.header
+        self.interval = interval
+        self.debounce = debounce
+        self.stamps = {path: self.stamp(path) for path in (in_file_name, self.header)}
+        self.source = None
+        self.result = None
+
+    @staticmethod
+    def stamp(path: str) -> tuple[int, int] | None:
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def changes(self) -> set[str]:
+        changed = set()
+        for path, old in self.stamps.items():
+            new = self.stamp(path)
+            if new != old:
+                self.stamps[path] = new
+                changed.add(path)
+        return changed
+
+    def wait_for_changes(self) -> set[str]:
+        changed: set[str] = set()
+        while not changed:
+            time.sleep(self.interval)
+            changed = self.changes()
+        quiet_since = time.monotonic()
+        while time.monotonic() - quiet_since < self.debounce:
+            time.sleep(self.interval)
+            more = self.changes()
+            if more:
+                changed |= more
+                quiet_since = time.monotonic()
+        return changed
+
+    def rebuild(self, changed: set[str]) -> None:
+        start = time.perf_counter()
+        timings = []
+        try:
+            with open(self.in_file_name, "r") as in_file:
+                source = in_file.read()
+        except FileNotFoundError:
+            print(f"ERROR: {self.in_file_name} does not exist")
+            return
+        needs_build = False
+        if source != self.source:
+            stage_start = time.perf_counter()
+            self.result = compile_source(source, replace(self.options, output=None))
+            self.source = source
+            timings.append(("frontend", time.perf_counter() - stage_start))
+            needs_build = True
+            if self.result.cpp is not None and self.cpp_path is not None:
+                with open(self.cpp_path, "w") as cpp_file:
+                    cpp_file.write(self.result.cpp)
+        elif self.header in changed:
+            needs_build = True
+        assert self.result is not None, "the first rebuild always runs the frontend"
+        if not needs_build:
+            return
+        for diagnostic in self.result.diagnostics:
+            print(diagnostic)
+        success = self.result.success
+        if success:
+            for func in self.result.removed:
+                print(f"Removed unreachable function {func.func_name}")
+        if success and self.result.cpp is not None and self.options.output is not None:
+            stage_start = time.perf_counter()
+            diagnostic = build(self.result.cpp, self.options)
+            timings.append(("g++", time.perf_counter() - stage_start))
+            if diagnostic is not None:
+                print(diagnostic)
+                success = False
+        stages = ", ".join(f"{name} {seconds * 1000:.1f} ms" for name, seconds in timings)
+        milliseconds = (time.perf_counter() - start) * 1000
+        if success:
+            print(f"Rebuilt {self.in_file_name} in {milliseconds:.1f} ms ({stages})")
+        else:
+            print(f"Rebuilding {self.in_file_name} failed after {milliseconds:.1f} ms ({stages})")
+
+    def run(self) -> None:
+        self.rebuild({self.in_file_name, self.header})
+        print(f"Watching {self.in_file_name}, press Ctrl+C to stop.")
+        try:
+            while True:
+                self.rebuild(self.wait_for_changes())
+        except KeyboardInterrupt:
+            pass